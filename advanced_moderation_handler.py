@@ -1,3 +1,4 @@
+import bisect
 import logging
 import time
 from datetime import datetime, timedelta
@@ -21,17 +22,76 @@ class ModerationResult:
     reason: str
 
 
-@dataclass 
+@dataclass(slots=True)
 class UserViolationHistory:
     """Historique des violations d'un utilisateur."""
     warnings: List[datetime]
     kicks: List[datetime]
     violations_by_type: Dict[str, List[datetime]]
-    
+
     def __len__(self):
         """Retourne le nombre total de violations."""
         return len(self.warnings) + len(self.kicks)
 
+    @staticmethod
+    def _recent_deltas(violations: List[datetime], cutoff_time: datetime,
+                       base_ts: int) -> List[int]:
+        """Tranche récente d'une liste triée, en deltas de secondes vs base_ts."""
+        idx = bisect.bisect_right(violations, cutoff_time)
+        return [int(v.timestamp()) - base_ts for v in violations[idx:]]
+
+    def to_compact(self, cutoff_time: datetime, base_ts: int) -> Optional[dict]:
+        """Vue sérialisable des violations récentes (ou None si plus rien).
+
+        C'est la classe qui possède le chemin chaud de sérialisation: les
+        listes sont triées chronologiquement, la frontière du cutoff est
+        trouvée par bissection et seules les tranches récentes sont encodées.
+        """
+        recent_warnings = self._recent_deltas(self.warnings, cutoff_time, base_ts)
+        recent_kicks = self._recent_deltas(self.kicks, cutoff_time, base_ts)
+
+        if not recent_warnings and not recent_kicks:
+            return None
+
+        return {
+            'warnings': recent_warnings,
+            'kicks': recent_kicks,
+            'violations_by_type': {
+                vtype: self._recent_deltas(violations, cutoff_time, base_ts)
+                for vtype, violations in self.violations_by_type.items()
+            }
+        }
+
+    @classmethod
+    def from_compact(cls, data: dict, parse) -> 'UserViolationHistory':
+        """Reconstruit un historique depuis sa forme sérialisée.
+
+        `parse` convertit une liste sérialisée en liste de datetime (le
+        format dépend de la version du fichier d'état).
+        """
+        return cls(
+            warnings=parse(data.get('warnings', [])),
+            kicks=parse(data.get('kicks', [])),
+            violations_by_type={
+                vtype: parse(violations)
+                for vtype, violations in data.get('violations_by_type', {}).items()
+            }
+        )
+
+    def prune(self, cutoff_time: datetime) -> bool:
+        """Supprime en place tout ce qui précède le cutoff; True si vidé."""
+        del self.warnings[:bisect.bisect_right(self.warnings, cutoff_time)]
+        del self.kicks[:bisect.bisect_right(self.kicks, cutoff_time)]
+
+        by_type = self.violations_by_type
+        for vtype in list(by_type):
+            violations = by_type[vtype]
+            del violations[:bisect.bisect_right(violations, cutoff_time)]
+            if not violations:
+                del by_type[vtype]
+
+        return not self.warnings and not self.kicks
+
 
 class AdvancedModerationHandler:
     """
@@ -517,20 +577,9 @@ class AdvancedModerationHandler:
             return
         
         reset_threshold = current_time - timedelta(hours=self.reset_hours)
-        user_history = self.user_violations[user]
-        
-        # Nettoyer warnings et kicks
-        user_history.warnings = [w for w in user_history.warnings if w > reset_threshold]
-        user_history.kicks = [k for k in user_history.kicks if k > reset_threshold]
-        
-        # Nettoyer violations par type
-        for violation_type in list(user_history.violations_by_type.keys()):
-            user_history.violations_by_type[violation_type] = [
-                v for v in user_history.violations_by_type[violation_type] 
-                if v > reset_threshold
-            ]
-            if not user_history.violations_by_type[violation_type]:
-                del user_history.violations_by_type[violation_type]
+        # Les listes sont chronologiques: l'historique élague lui-même son
+        # préfixe expiré par bissection
+        self.user_violations[user].prune(reset_threshold)
 
     def get_user_status(self, user: str) -> Dict:
         """Retourne le statut d'un utilisateur."""
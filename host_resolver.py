@@ -31,63 +31,69 @@ class HostResolver:
         Récupère le host d'un utilisateur depuis IRC.
         Retourne le host pour faire un ban *@host.
         """
-        try:
-            # Vérifier le cache d'abord
-            if self._is_host_cached(username):
-                cached_host = self.user_hosts[username]
-                self.logger.debug(f"Host en cache pour {username}: {cached_host}")
-                return cached_host
-            
-            # Méthode 1: Utiliser la liste des utilisateurs du canal
-            if hasattr(irc_client, 'channels') and channel in irc_client.channels:
-                channel_obj = irc_client.channels[channel]
-                
-                # Chercher dans les informations utilisateur
-                if hasattr(channel_obj, 'users'):
-                    users = channel_obj.users()
-                    for user in users:
-                        if user == username or user.lstrip('@%+') == username:
-                            # Tenter de récupérer les infos complètes
-                            if hasattr(channel_obj, 'get_user_info'):
-                                user_info = channel_obj.get_user_info(username)
-                                if user_info and hasattr(user_info, 'host'):
-                                    host = user_info.host
-                                    self._cache_host(username, host)
-                                    return host
-                                    
-                # Méthode alternative: chercher dans users_data si disponible
-                if hasattr(channel_obj, 'users_data'):
-                    for user_data in channel_obj.users_data.values():
-                        if hasattr(user_data, 'nick') and user_data.nick.lower() == username.lower():
-                            if hasattr(user_data, 'host') and user_data.host:
-                                host = user_data.host
+        host = self._resolve(irc_client, channel, username)
+        if host is not None:
+            return host
+
+        # Méthode 4: Envoyer une requête WHO (peut prendre du temps)
+        self._request_who_info(irc_client, username)
+
+        self.logger.warning(f"Impossible de récupérer le host pour {username}")
+        return None
+
+    def _resolve(self, irc_client, channel: str, username: str) -> Optional[str]:
+        """
+        Résolution du host sans effet de bord réseau.
+        Retourne None si introuvable (pas d'exception levée).
+        """
+        # Vérifier le cache d'abord
+        if self._is_host_cached(username):
+            cached_host = self.user_hosts[username]
+            self.logger.debug(f"Host en cache pour {username}: {cached_host}")
+            return cached_host
+
+        # Méthode 1: Utiliser la liste des utilisateurs du canal
+        if hasattr(irc_client, 'channels') and channel in irc_client.channels:
+            channel_obj = irc_client.channels[channel]
+
+            # Chercher dans les informations utilisateur
+            if hasattr(channel_obj, 'users'):
+                users = channel_obj.users()
+                for user in users:
+                    if user == username or user.lstrip('@%+') == username:
+                        # Tenter de récupérer les infos complètes
+                        if hasattr(channel_obj, 'get_user_info'):
+                            user_info = channel_obj.get_user_info(username)
+                            if user_info and hasattr(user_info, 'host'):
+                                host = user_info.host
                                 self._cache_host(username, host)
                                 return host
-            
-            # Méthode 2: Parsing depuis les événements IRC récents
-            # (Les infos host sont souvent disponibles dans les événements join/who)
-            if hasattr(irc_client, 'last_user_info'):
-                user_info = irc_client.last_user_info.get(username.lower())
-                if user_info and 'host' in user_info:
-                    host = user_info['host']
-                    self._cache_host(username, host)
-                    return host
-            
-            # Méthode 3: Tenter d'extraire le host depuis les données de connexion récentes
-            host = self._extract_host_from_recent_data(irc_client, username)
-            if host:
+
+            # Méthode alternative: chercher dans users_data si disponible
+            if hasattr(channel_obj, 'users_data'):
+                for user_data in channel_obj.users_data.values():
+                    if hasattr(user_data, 'nick') and user_data.nick.lower() == username.lower():
+                        if hasattr(user_data, 'host') and user_data.host:
+                            host = user_data.host
+                            self._cache_host(username, host)
+                            return host
+
+        # Méthode 2: Parsing depuis les événements IRC récents
+        # (Les infos host sont souvent disponibles dans les événements join/who)
+        if hasattr(irc_client, 'last_user_info'):
+            user_info = irc_client.last_user_info.get(username.lower())
+            if user_info and 'host' in user_info:
+                host = user_info['host']
                 self._cache_host(username, host)
                 return host
-            
-            # Méthode 4: Envoyer une requête WHO (peut prendre du temps)
-            self._request_who_info(irc_client, username)
-            
-            self.logger.warning(f"Impossible de récupérer le host pour {username}")
-            return None
-            
-        except Exception as e:
-            self.logger.error(f"Erreur lors de la résolution host pour {username}: {e}")
-            return None
+
+        # Méthode 3: Tenter d'extraire le host depuis les données de connexion récentes
+        host = self._extract_host_from_recent_data(irc_client, username)
+        if host:
+            self._cache_host(username, host)
+            return host
+
+        return None
     
     def get_ban_mask(self, irc_client, channel: str, username: str) -> str:
         """
@@ -120,28 +126,28 @@ class HostResolver:
         """
         Récupère toutes les infos disponibles d'un utilisateur.
         """
+        # Calculé une seule fois, réutilisé par les deux branches
+        fallback_mask = f"{username}!*@*"
+
         try:
             host = self.get_user_host(irc_client, channel, username)
-            
-            result = {
-                'username': username,
-                'host': host,
-                'ban_mask': self.get_ban_mask(irc_client, channel, username),
-                'has_host': host is not None,
-                'cache_age': self._get_cache_age(username)
-            }
-            
-            return result
-            
         except Exception as e:
             self.logger.error(f"Erreur récupération infos pour {username}: {e}")
             return {
                 'username': username,
                 'host': None,
-                'ban_mask': f"{username}!*@*",
+                'ban_mask': fallback_mask,
                 'has_host': False,
                 'error': str(e)
             }
+
+        return {
+            'username': username,
+            'host': host,
+            'ban_mask': f"*@{host}" if host else fallback_mask,
+            'has_host': host is not None,
+            'cache_age': self._get_cache_age(username)
+        }
     
     def _is_host_cached(self, username: str) -> bool:
         """Vérifie si le host est en cache et pas expiré."""
@@ -171,10 +177,18 @@ class HostResolver:
         Tente d'extraire le host depuis les données de connexion récentes.
         """
         try:
+            username_lower = username.lower()
+
             # Vérifier dans l'historique des connexions/déconnexions
-            if hasattr(irc_client, 'connection_history'):
-                for event in reversed(irc_client.connection_history[-50:]):  # 50 derniers événements
-                    if hasattr(event, 'source') and username.lower() in event.source.lower():
+            # Itération par index du plus récent au plus ancien: pas de copie
+            # de liste intermédiaire ([-50:]) ni d'objet reversed()
+            history = getattr(irc_client, 'connection_history', None)
+            if history:
+                start = len(history) - 1
+                stop = max(-1, start - 50)  # 50 derniers événements
+                for i in range(start, stop, -1):
+                    event = history[i]
+                    if hasattr(event, 'source') and username_lower in event.source.lower():
                         # Format typique: nick!user@host
                         if '@' in event.source and '!' in event.source:
                             parts = event.source.split('@')
@@ -182,11 +196,15 @@ class HostResolver:
                                 host = parts[-1]  # Dernière partie après @
                                 self.logger.debug(f"Host trouvé depuis l'historique pour {username}: {host}")
                                 return host
-            
+
             # Vérifier dans les événements de message récents
-            if hasattr(irc_client, 'recent_messages'):
-                for msg_data in reversed(irc_client.recent_messages[-20:]):  # 20 derniers messages
-                    if msg_data.get('nick', '').lower() == username.lower():
+            messages = getattr(irc_client, 'recent_messages', None)
+            if messages:
+                start = len(messages) - 1
+                stop = max(-1, start - 20)  # 20 derniers messages
+                for i in range(start, stop, -1):
+                    msg_data = messages[i]
+                    if msg_data.get('nick', '').lower() == username_lower:
                         source = msg_data.get('source', '')
                         if '@' in source and '!' in source:
                             parts = source.split('@')
@@ -194,9 +212,9 @@ class HostResolver:
                                 host = parts[-1]
                                 self.logger.debug(f"Host trouvé depuis les messages pour {username}: {host}")
                                 return host
-            
+
             return None
-            
+
         except Exception as e:
             self.logger.error(f"Erreur extraction host depuis données récentes pour {username}: {e}")
             return None
@@ -217,18 +235,26 @@ class HostResolver:
         """
         Capture et met en cache le host depuis un événement IRC.
         Format source attendu: nick!user@host
+
+        Appelé depuis la boucle d'événements IRC sur chaque JOIN/PRIVMSG:
+        chemin rapide sans découpage intermédiaire ni double écriture cache.
         """
-        try:
-            if '@' in source and '!' in source:
-                parts = source.split('@')
-                if len(parts) >= 2:
-                    host = parts[-1]
-                    self._cache_host(username, host)
-                    self.logger.debug(f"Host capturé depuis événement pour {username}: {host}")
-                    return host
-        except Exception as e:
-            self.logger.error(f"Erreur capture host depuis événement pour {username}: {e}")
-        return None
+        bang = source.find('!')
+        if bang < 0:
+            return None
+        at = source.rfind('@')
+        if at <= bang:
+            return None
+        host = source[at + 1:]
+
+        # Éviter la ré-écriture si le host est déjà en cache, identique et frais
+        if (self.user_hosts.get(username) == host
+                and time.time() - self.last_updated[username] < self.host_cache_timeout):
+            return host
+
+        self.user_hosts[username] = host
+        self.last_updated[username] = time.time()
+        return host
     
     def clear_cache(self):
         """Vide le cache des hosts."""
@@ -1,18 +1,33 @@
 import irc.bot
 import irc.strings
 import irc.connection
+import heapq
+import queue
+import socket
 import ssl
 import logging
+import threading
 import time
-from threading import Timer
+from collections import deque
 from badwords_filter import BadWordsFilter
 from nickname_filter import NicknameFilter
 from admin_commands import AdminCommands
+from reconnect_backoff import ReconnectBackoff
 
 # Configure encoding error handling for IRC
 import irc.client
 import jaraco.stream.buffer
 
+# Logger de module: évite un getLogger (verrou + lookup) dans les chemins chauds
+logger = logging.getLogger(__name__)
+
+# Repli de casse RFC 1459: les nicks IRC sont insensibles à la casse et
+# replient aussi []\^ vers {}|~ (table str.translate précalculée)
+_RFC1459_LOWER = str.maketrans(
+    'ABCDEFGHIJKLMNOPQRSTUVWXYZ[]\\^',
+    'abcdefghijklmnopqrstuvwxyz{}|~'
+)
+
 # Global configuration to handle encoding errors more gracefully
 def patch_irc_encoding():
     """Patch IRC library to handle encoding errors more gracefully."""
@@ -20,19 +35,23 @@ def patch_irc_encoding():
         # Simple and safe approach: just catch UnicodeDecodeError in the reactor
         if hasattr(irc.client, 'Reactor'):
             original_process_data = irc.client.Reactor.process_data
-            
+
+            # Ne jamais ré-empiler le wrapper: chaque couche supplémentaire
+            # serait une frame Python de plus sur chaque lecture réseau
+            if getattr(original_process_data, '_utf8_patched', False):
+                return
+
             def robust_process_data(self, sockets):
                 """Process data with UTF-8 error handling."""
                 try:
                     return original_process_data(self, sockets)
                 except UnicodeDecodeError as e:
                     # Log the error and continue
-                    import logging
-                    logger = logging.getLogger(__name__)
                     logger.warning(f"Erreur d'encodage UTF-8 gérée automatiquement: {e}")
                     # Return empty to continue processing
                     return
                     
+            robust_process_data._utf8_patched = True
             irc.client.Reactor.process_data = robust_process_data
             print("✅ Encodage IRC: Patch Reactor.process_data pour gestion des erreurs UTF-8")
             
@@ -73,8 +92,19 @@ class IRCClient(irc.bot.SingleServerIRCBot):
         
         # Récupérer les canaux depuis la config fusionnée (renommer pour éviter conflit avec IRC lib)
         self.bot_channels = config['irc'].get('channels', ['#francophonie', '#adultes'])
-        self.monitored_channel = config['irc'].get('monitored_channel', '#francophonie')  
+        self.monitored_channel = config['irc'].get('monitored_channel', '#francophonie')
         self.redirect_channel = config['irc'].get('redirect_channel', '#adultes')
+        # Figé une fois pour toutes: testé sur chaque message entrant
+        self._moderated_channels = frozenset((self.monitored_channel, self.redirect_channel))
+        self._nick = config['irc']['nickname']
+        self._nick_folded = self._nick.translate(_RFC1459_LOWER)
+        # Gabarits bytes pré-encodés pour la séquence de redirection: les noms
+        # de canaux ne sont plus ré-encodés à chaque action IRCop
+        _monitored = self.monitored_channel.encode('utf-8')
+        _redirect = self.redirect_channel.encode('utf-8')
+        self._sapart_tmpl = b"SAPART %s " + _monitored + b" :%s"
+        self._ban_add_tmpl = b"MODE " + _monitored + b" +b %s!*@*"
+        self._sajoin_tmpl = b"SAJOIN %s " + _redirect
         self.is_ircop = config['irc'].get('is_ircop', False)
         self.ircop_login = config['irc'].get('ircop_login')
         self.ircop_password = config['irc'].get('ircop_password')
@@ -85,13 +115,63 @@ class IRCClient(irc.bot.SingleServerIRCBot):
         self.connected = False
         self.joined_channels = set()
         self.reconnect_attempts = 0
-        self.max_reconnect_attempts = 5
-        self.current_server_index = self.preferred_server_index
+        self._servers = config['irc']['servers']
+        self._select_server(self.preferred_server_index)
+        self._backoff = ReconnectBackoff(base=self.retry_delay, factor=2,
+                                         cap=1800, reset_after=600)
         
-        # Système de keepalive
+        # Système de keepalive (piloté par le scheduler du réacteur IRC,
+        # pas de thread Timer dédié par ping)
         self.last_ping_time = 0
         self.ping_interval = config['irc'].get('ping_interval_seconds', 300)  # 5 minutes
-        self.keepalive_timer = None
+        self._keepalive_generation = 0
+        # Estimateur RTT (Jacobson/Karels) pour adapter l'intervalle de PING
+        self._rtt_srtt = 0.0
+        self._rtt_var = 0.0
+        self._pings_without_pong = 0
+
+        # Débans temporaires en attente: tas (échéance, pseudo) avec un seul
+        # réveil programmé à la fois au lieu d'un timer par utilisateur
+        self._pending_unbans = []
+        self._unban_wakeup = 0.0
+
+        # File d'envoi sortante sous token bucket (2 lignes/s, rafale de 5):
+        # respecte les limites anti-flood serveur et groupe les write()
+        self._out_queue = deque()
+        self._max_tokens = 5.0
+        self._token_rate = 2.0  # jetons recrédités par seconde
+        self._send_tokens = self._max_tokens
+        self._last_refill = time.monotonic()
+
+        # Le scheduler de la lib irc (simple liste + bisect.insort) et le
+        # socket ne sont pas thread-safe: les workers de modération déposent
+        # ici les opérations à exécuter côté réacteur (programmation de
+        # débans, etc.) et une tâche périodique les rejoue, puis vide la
+        # file d'envoi — toujours depuis le thread réacteur
+        self._reactor_calls = queue.Queue()
+        self.reactor.scheduler.execute_every(0.1, self._pump_reactor_tasks)
+
+        # Analyse de modération hors du thread réacteur: file bornée + workers,
+        # pour que le réacteur reste une pure boucle d'E/S même si l'analyse
+        # (regex, API OpenAI) prend du temps
+        self._mod_queue = queue.Queue(maxsize=int(config['irc'].get('mod_queue_size', 1024)))
+        for i in range(int(config['irc'].get('mod_workers', 2))):
+            worker = threading.Thread(target=self._moderation_worker,
+                                      daemon=True, name=f"mod-worker-{i + 1}")
+            worker.start()
+
+        # Journal des messages publics agrégé: une entrée INFO par vidage
+        # périodique au lieu d'une par message (les WARNING de modération
+        # restent émis immédiatement, eux)
+        self._msg_log_buffer = deque()
+        self.reactor.scheduler.execute_every(2.0, self._flush_msg_log)
+
+    def _select_server(self, index):
+        """Sélectionne le serveur courant et met en cache son (hostname, port, ssl)."""
+        self.current_server_index = index
+        server = self._servers[index]
+        self._current_server_cache = (server['hostname'], server['port'],
+                                      server.get('ssl', False))
 
     def _prepare_server_list(self, server_configs):
         """Prépare la liste des serveurs (SSL simplifié)."""
@@ -127,36 +207,82 @@ class IRCClient(irc.bot.SingleServerIRCBot):
         except Exception as e:
             self.logger.debug(f"Configuration d'encodage additionnelle ignorée: {e}")
 
+    def _tune_socket(self, connection):
+        """
+        Règle la socket IRC pour la latence et la détection de pair mort:
+        TCP_NODELAY (pas d'attente Nagle sur les petits PRIVMSG) et
+        keepalive TCP noyau (plus rapide qu'un cycle PING de 5 minutes).
+        """
+        sock = getattr(connection, 'socket', None)
+        if sock is None:
+            return
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            # Options Linux: sonde après 60s d'inactivité, toutes les 20s, 3 échecs max
+            if hasattr(socket, 'TCP_KEEPIDLE'):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 20)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
+            if hasattr(socket, 'TCP_USER_TIMEOUT'):
+                # Une connexion à moitié ouverte fait échouer send() au lieu de bloquer
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_USER_TIMEOUT,
+                                (60 + 20 * 3) * 1000)
+            self.logger.debug("Socket IRC réglée: TCP_NODELAY + keepalive noyau")
+        except OSError as e:
+            self.logger.debug(f"Réglage socket IRC ignoré: {e}")
+
     def on_welcome(self, connection, event):
         server_info = f"{connection.server}:{connection.port}"
         self.logger.info(f"Connecté au serveur IRC {server_info}")
+
+        self._tune_socket(connection)
         
         # S'identifier comme IRCop si configuré
         if self.is_ircop and self.ircop_login and self.ircop_password:
             connection.send_raw(f"OPER {self.ircop_login} {self.ircop_password}")
             self.logger.info("Identification IRCop envoyée")
         
-        # Rejoindre tous les canaux configurés
+        # Rejoindre tous les canaux configurés en une seule commande JOIN
+        # multi-cibles (découpée si la ligne dépasserait la limite IRC)
         self.logger.info(f"Tentative de rejoindre les canaux: {self.bot_channels}")
+        batch = []
+        batch_len = 0
         for channel in self.bot_channels:
-            self.logger.info(f"Rejoindre le canal: {channel}")
-            connection.join(channel)
+            if batch and batch_len + len(channel) + 1 > 450:
+                connection.send_raw("JOIN " + ",".join(batch))
+                batch = []
+                batch_len = 0
+            batch.append(channel)
+            batch_len += len(channel) + 1
+        if batch:
+            connection.send_raw("JOIN " + ",".join(batch))
             
         self.connected = True
         self.reconnect_attempts = 0
+
+        # Ne réinitialiser le backoff qu'après une connexion restée stable,
+        # sinon un serveur qui rejette juste après le welcome annule l'escalade
+        self.reactor.scheduler.execute_after(
+            self._backoff.reset_after, self._maybe_reset_backoff)
         
         # Vider les banlists au démarrage
         if hasattr(self, 'moderation_handler') and self.moderation_handler:
             for channel in self.bot_channels:
                 self.moderation_handler.clear_bans_on_startup(self, channel)
         
-        # Démarrer le keepalive
+        # Démarrer le keepalive en repartant de zéro: une nouvelle connexion
+        # ne doit pas hériter des PONG manqués de la précédente (sinon le
+        # premier ping post-reconnexion déclencherait aussitôt une reconnexion)
+        # ni d'un last_ping_time périmé qui fausserait la première mesure RTT
+        self._pings_without_pong = 0
+        self.last_ping_time = 0
         self._start_keepalive()
 
     def on_join(self, connection, event):
         try:
             channel = event.target
-            user = event.source.nick if hasattr(event.source, 'nick') else str(event.source)
+            user = getattr(event.source, 'nick', None) or str(event.source)
             
             # Capturer le host de l'utilisateur qui rejoint
             if hasattr(self, 'admin_commands') and hasattr(self.admin_commands, 'host_resolver'):
@@ -168,14 +294,14 @@ class IRCClient(irc.bot.SingleServerIRCBot):
                 self.channels[channel] = irc.bot.Channel()
                 self.logger.debug(f"Canal {channel} initialisé dans la structure channels")
             
-            # Si c'est notre bot qui rejoint
-            if user == self.config['irc']['nickname']:
+            # Si c'est notre bot qui rejoint (comparaison insensible à la casse RFC 1459)
+            if user.translate(_RFC1459_LOWER) == self._nick_folded:
                 self.joined_channels.add(channel)
                 self.logger.info(f"Bot rejoint le canal {channel}")
-                
+
                 # Se donner les privilèges d'opérateur sur les canaux de modération
-                if self.is_ircop and channel in [self.monitored_channel, self.redirect_channel]:
-                    connection.send_raw(f"samode {channel} +o {self.config['irc']['nickname']}")
+                if self.is_ircop and channel in self._moderated_channels:
+                    connection.send_raw(f"samode {channel} +o {self._nick}")
                     self.logger.info(f"Privilèges OP demandés sur {channel} avec samode")
             else:
                 self.logger.info(f"Utilisateur {user} rejoint {channel}")
@@ -190,28 +316,27 @@ class IRCClient(irc.bot.SingleServerIRCBot):
                         return  # Arrêter le traitement pour cet utilisateur
                 
         except Exception as e:
-            self.logger.error(f"Erreur dans on_join: {e}")
-            import traceback
-            self.logger.error(f"Stack trace on_join: {traceback.format_exc()}")
+            # exc_info: la traceback n'est formatée que si le handler émet
+            self.logger.error(f"Erreur dans on_join: {e}", exc_info=True)
 
     def on_pubmsg(self, connection, event):
         try:
             channel = event.target
             message = event.arguments[0] if event.arguments else ""
-            sender = event.source.nick if hasattr(event.source, 'nick') else str(event.source)
+            sender = getattr(event.source, 'nick', None) or str(event.source)
             
             # Capturer le host de l'utilisateur qui envoie un message
             if hasattr(self, 'admin_commands') and hasattr(self.admin_commands, 'host_resolver'):
                 full_source = str(event.source)  # Format: nick!user@host
                 self.admin_commands.host_resolver.capture_host_from_event(sender, full_source)
             
-            # Ignorer les messages du bot lui-même
-            if sender == self.config['irc']['nickname']:
+            # Ignorer les messages du bot lui-même (repli de casse RFC 1459)
+            if sender.translate(_RFC1459_LOWER) == self._nick_folded:
                 return
-            
+
             # Analyser les messages des canaux de modération
-            if channel in [self.monitored_channel, self.redirect_channel]:
-                self.logger.info(f"[{channel}] <{sender}> {message}")
+            if channel in self._moderated_channels:
+                self._msg_log_buffer.append(f"[{channel}] <{sender}> {message}")
                 
                 # 0. D'abord vérifier si c'est une commande admin
                 if self.admin_commands.handle_command(self, channel, sender, message):
@@ -227,14 +352,36 @@ class IRCClient(irc.bot.SingleServerIRCBot):
                         return  # Ne pas passer à l'analyse IA si violation traitée
                 
                 # 2. Ensuite passer à l'analyse IA si pas de mot interdit détecté
-                self.moderation_handler.analyze_message(sender, message, channel, self)
+                try:
+                    self._mod_queue.put_nowait((sender, message, channel))
+                except queue.Full:
+                    self.logger.warning(f"File de modération pleine, message de {sender} ignoré")
             else:
-                # Log les autres canaux sans analyser
-                self.logger.debug(f"[{channel}] <{sender}> {message}")
+                # Log les autres canaux sans analyser (formatage %-différé)
+                self.logger.debug("[%s] <%s> %s", channel, sender, message)
         except Exception as e:
-            self.logger.error(f"Erreur dans on_pubmsg: {e}")
-            import traceback
-            self.logger.error(f"Stack trace on_pubmsg: {traceback.format_exc()}")
+            self.logger.error(f"Erreur dans on_pubmsg: {e}", exc_info=True)
+
+    def _flush_msg_log(self):
+        """Vide le tampon de journalisation des messages publics d'un coup."""
+        if not self._msg_log_buffer:
+            return
+        lines = []
+        while self._msg_log_buffer:
+            lines.append(self._msg_log_buffer.popleft())
+        self.logger.info("%s", "\n".join(lines))
+
+    def _moderation_worker(self):
+        """Thread de travail: dépile et analyse les messages à modérer."""
+        while True:
+            sender, message, channel = self._mod_queue.get()
+            try:
+                self.moderation_handler.analyze_message(sender, message, channel, self)
+            except Exception as e:
+                self.logger.error(f"Erreur d'analyse de modération pour {sender}: {e}",
+                                  exc_info=True)
+            finally:
+                self._mod_queue.task_done()
 
     def on_disconnect(self, connection, event):
         self.logger.warning("Déconnecté du serveur IRC")
@@ -247,47 +394,85 @@ class IRCClient(irc.bot.SingleServerIRCBot):
 
     def _schedule_reconnect(self):
         self.reconnect_attempts += 1
-        
+
         # Essayer le serveur suivant dans la liste
-        servers = self.config['irc']['servers']
-        self.current_server_index = (self.current_server_index + 1) % len(servers)
-        next_server = servers[self.current_server_index]
-        
-        # Reconnexion infinie avec backoff exponentiel intelligent
-        if self.reconnect_attempts <= self.max_reconnect_attempts:
-            # Délai normal pour les premières tentatives
-            delay = min(self.retry_delay * self.reconnect_attempts, 300)  # Max 5 minutes
-            cycle_info = "initial"
-        else:
-            # Après max_reconnect_attempts, utiliser backoff exponentiel avec reset périodique
-            cycle = (self.reconnect_attempts - self.max_reconnect_attempts) // len(servers) + 1
-            delay = min(300 * (2 ** min(cycle - 1, 6)), 1800)  # De 5min à 30min max
-            cycle_info = f"cycle {cycle}"
-            
-            # Reset des tentatives tous les 10 cycles pour éviter l'overflow
-            if cycle >= 10:
-                self.reconnect_attempts = self.max_reconnect_attempts
-                self.logger.info("Reset du compteur de tentatives pour éviter l'escalade infinie")
-        
-        self.logger.info(f"Reconnexion vers {next_server['hostname']}:{next_server['port']} "
-                       f"dans {delay}s (tentative {self.reconnect_attempts}, {cycle_info})")
-        
-        Timer(delay, self._reconnect).start()
+        self._select_server((self.current_server_index + 1) % len(self._servers))
+        hostname, port, _ = self._current_server_cache
+
+        # Reconnexion infinie: backoff exponentiel avec full jitter
+        delay = self._backoff.next_delay()
+
+        self.logger.info(f"Reconnexion vers {hostname}:{port} "
+                       f"dans {delay:.0f}s (tentative {self.reconnect_attempts})")
+
+        self.reactor.scheduler.execute_after(delay, self._reconnect)
+
+    def _maybe_reset_backoff(self):
+        """Reset le backoff si la connexion est toujours en vie."""
+        if self.connected:
+            self._backoff.reset()
+            self.logger.debug("Backoff de reconnexion réinitialisé (connexion stable)")
 
     def _reconnect(self):
         try:
-            servers = self.config['irc']['servers']
-            current_server = servers[self.current_server_index]
-            ssl_status = "SSL" if current_server.get('ssl') else "non-SSL"
-            self.logger.info(f"Tentative de reconnexion vers {current_server['hostname']}:{current_server['port']} ({ssl_status})")
+            hostname, port, use_ssl = self._current_server_cache
+            ssl_status = "SSL" if use_ssl else "non-SSL"
+            self.logger.info(f"Tentative de reconnexion vers {hostname}:{port} ({ssl_status})")
             self.jump_server()
         except Exception as e:
             self.logger.error(f"Erreur lors de la reconnexion: {e}")
             self._schedule_reconnect()
 
+    def _pump_reactor_tasks(self):
+        """Rejoue côté réacteur les opérations déposées par les workers."""
+        while True:
+            try:
+                task = self._reactor_calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                task()
+            except Exception as e:
+                self.logger.error(f"Erreur tâche réacteur: {e}", exc_info=True)
+        self._flush_out_queue()
+
+    def _queue_raw(self, line):
+        """Met une ligne IRC en file d'envoi, vidée sous token bucket."""
+        self._out_queue.append(line.encode('utf-8', 'replace'))
+
+    def _queue_raw_bytes(self, line):
+        """Variante de _queue_raw pour les lignes déjà encodées en bytes."""
+        self._out_queue.append(line)
+
+    def _flush_out_queue(self):
+        """Envoie autant de lignes que le bucket autorise, en un seul write()."""
+        sock = getattr(self.connection, 'socket', None)
+        if sock is None or not self._out_queue:
+            return
+
+        # Recréditer le bucket au prorata du temps écoulé
+        now = time.monotonic()
+        self._send_tokens = min(self._max_tokens,
+                                self._send_tokens + (now - self._last_refill) * self._token_rate)
+        self._last_refill = now
+
+        batch = []
+        while self._out_queue and self._send_tokens >= 1.0:
+            batch.append(self._out_queue.popleft())
+            self._send_tokens -= 1.0
+
+        if batch:
+            try:
+                # Une seule écriture pour tout le lot (TCP_NODELAY est actif)
+                sock.sendall(b"\r\n".join(batch) + b"\r\n")
+            except OSError as e:
+                self.logger.warning(f"Erreur d'envoi IRC: {e}")
+        # Les lignes encore en attente de jetons repartiront au prochain
+        # passage de _pump_reactor_tasks
+
     def send_message(self, channel, message):
         if self.connected:
-            self.connection.privmsg(channel, message)
+            self._queue_raw(f"PRIVMSG {channel} :{message}")
             self.logger.info(f"Message envoyé sur {channel}: {message}")
         else:
             self.logger.warning("Impossible d'envoyer le message: non connecté")
@@ -299,29 +484,67 @@ class IRCClient(irc.bot.SingleServerIRCBot):
     def move_user_to_adultes(self, user, reason="Contenu adulte détecté"):
         """Déplace un utilisateur vers le canal de redirection avec SAPART et SAJOIN."""
         if self.connected and self.is_ircop:
+            user_bytes = user.encode('utf-8', 'replace')
+            queue_raw_bytes = self._queue_raw_bytes  # liaison unique pour les 3 envois
+
             # 1. Faire partir l'utilisateur de #francophonie avec SAPART
-            self.connection.send_raw(f"SAPART {user} {self.monitored_channel} :{reason}")
-            
+            queue_raw_bytes(self._sapart_tmpl
+                            % (user_bytes, reason.encode('utf-8', 'replace')))
+
             # 2. Le bannir temporairement pour l'empêcher de revenir immédiatement
-            self.connection.send_raw(f"MODE {self.monitored_channel} +b {user}!*@*")
-            
+            queue_raw_bytes(self._ban_add_tmpl % user_bytes)
+
             # 3. Faire rejoindre l'utilisateur sur le canal de redirection avec SAJOIN
-            self.connection.send_raw(f"SAJOIN {user} {self.redirect_channel}")
-            
-            # 4. Débannir après quelques secondes (pour éviter qu'il revienne direct)
-            import threading
-            def unban_user():
-                if self.connected:
-                    self.connection.send_raw(f"MODE {self.monitored_channel} -b {user}!*@*")
-                    self.logger.info(f"Ban temporaire levé pour {user} sur {self.monitored_channel} (après 10 minutes)")
-            threading.Timer(600.0, unban_user).start()  # Déban après 10 minutes
+            queue_raw_bytes(self._sajoin_tmpl % user_bytes)
             
+            # 4. Débannir après quelques secondes (pour éviter qu'il revienne
+            # direct). On est ici sur un worker de modération: l'inscription
+            # dans le tas et la programmation du réveil passent par la file
+            # des tâches réacteur plutôt que de toucher le scheduler directement
+            deadline = time.monotonic() + 600.0  # Déban après 10 minutes
+            self._reactor_calls.put(lambda: self._register_unban(user, deadline))
+
             self.logger.info(f"SAPART {user} de {self.monitored_channel} puis SAJOIN vers {self.redirect_channel}")
             return True
         else:
             self.logger.warning(f"Impossible de déplacer {user}: non connecté ou pas IRCop")
             return False
     
+    def _register_unban(self, user, deadline):
+        """Inscrit un déban temporaire et programme son réveil (thread réacteur)."""
+        heapq.heappush(self._pending_unbans, (deadline, user))
+        self._schedule_unban_wakeup(deadline)
+
+    def _schedule_unban_wakeup(self, deadline):
+        """Programme un réveil du traitement des débans si nécessaire."""
+        if self._unban_wakeup and deadline >= self._unban_wakeup:
+            return  # Un réveil plus tôt est déjà programmé
+        self._unban_wakeup = deadline
+        self.reactor.scheduler.execute_after(
+            max(0.0, deadline - time.monotonic()), self._process_pending_unbans)
+
+    def _process_pending_unbans(self):
+        """Lève tous les bans temporaires arrivés à échéance, en lignes MODE groupées."""
+        self._unban_wakeup = 0.0
+        now = time.monotonic()
+        ready = []
+        while self._pending_unbans and self._pending_unbans[0][0] <= now:
+            ready.append(heapq.heappop(self._pending_unbans)[1])
+
+        if ready and self.connected:
+            queue_raw = self._queue_raw
+            # Grouper jusqu'à 4 masques par ligne MODE (limite MODES usuelle)
+            for i in range(0, len(ready), 4):
+                batch = ready[i:i + 4]
+                modes = '-' + 'b' * len(batch)
+                masks = ' '.join(f"{user}!*@*" for user in batch)
+                queue_raw(f"MODE {self.monitored_channel} {modes} {masks}")
+                self.logger.info(f"Ban temporaire levé pour {', '.join(batch)} "
+                                 f"sur {self.monitored_channel} (après 10 minutes)")
+
+        if self._pending_unbans:
+            self._schedule_unban_wakeup(self._pending_unbans[0][0])
+
     def send_welcome_message_adultes(self, user):
         """Envoie un message d'accueil sympathique sur le canal de redirection."""
         # Le message sera fourni par l'appelant via le message rotator
@@ -330,43 +553,58 @@ class IRCClient(irc.bot.SingleServerIRCBot):
     def ban_user(self, channel, user):
         """Méthode de ban classique (gardée pour compatibilité)."""
         if self.connected:
-            self.connection.mode(channel, f"+b {user}!*@*")
-            self.connection.kick(channel, user, "Non-respect des règles du canal")
+            self._queue_raw(f"MODE {channel} +b {user}!*@*")
+            self._queue_raw(f"KICK {channel} {user} :Non-respect des règles du canal")
             self.logger.info(f"Utilisateur {user} banni de {channel}")
         else:
             self.logger.warning(f"Impossible de bannir {user}: non connecté")
     
+    def _keepalive_interval(self):
+        """
+        Intervalle avant le prochain PING, adapté au RTT mesuré:
+        court quand la liaison gigote (détection rapide), long quand elle
+        est stable. Bornes 30s..600s; défaut configuré tant qu'aucun RTT
+        n'a été observé.
+        """
+        if self._rtt_srtt == 0.0:
+            return self.ping_interval
+        return max(30.0, min(600.0, 60.0 + 4.0 * self._rtt_var))
+
     def _start_keepalive(self):
         """Démarre le système de keepalive avec PING périodique."""
-        if self.keepalive_timer:
-            self.keepalive_timer.cancel()
-        
-        import threading
-        self.keepalive_timer = threading.Timer(self.ping_interval, self._send_keepalive_ping)
-        self.keepalive_timer.daemon = True
-        self.keepalive_timer.start()
-        self.logger.debug(f"Keepalive démarré (PING toutes les {self.ping_interval}s)")
-    
+        # Incrémenter la génération invalide tout ping déjà programmé
+        self._keepalive_generation += 1
+        generation = self._keepalive_generation
+        interval = self._keepalive_interval()
+        self.reactor.scheduler.execute_after(
+            interval, lambda: self._send_keepalive_ping(generation))
+        self.logger.debug("Keepalive démarré (prochain PING dans %.0fs)", interval)
+
     def _stop_keepalive(self):
         """Arrête le système de keepalive."""
-        if self.keepalive_timer:
-            self.keepalive_timer.cancel()
-            self.keepalive_timer = None
-            self.logger.debug("Keepalive arrêté")
-    
-    def _send_keepalive_ping(self):
+        self._keepalive_generation += 1
+        self.logger.debug("Keepalive arrêté")
+
+    def _send_keepalive_ping(self, generation=None):
         """Envoie un PING au serveur pour maintenir la connexion."""
+        if generation is not None and generation != self._keepalive_generation:
+            return  # Keepalive arrêté ou redémarré entre-temps
         if self.connected:
+            # Deux PING consécutifs restés sans PONG: connexion considérée morte
+            if self._pings_without_pong >= 2:
+                self.logger.warning("Aucun PONG après 2 PING, forçage de la reconnexion")
+                self.connected = False
+                self._schedule_reconnect()
+                return
             try:
                 # Envoyer PING au serveur actuel
-                servers = self.config['irc']['servers']
-                current_server = servers[self.current_server_index]
-                ping_target = current_server['hostname']
-                
+                ping_target = self._current_server_cache[0]
+
                 self.connection.ping(ping_target)
-                self.last_ping_time = time.time()
-                self.logger.debug(f"PING envoyé vers {ping_target}")
-                
+                self.last_ping_time = time.monotonic()
+                self._pings_without_pong += 1
+                self.logger.debug("PING envoyé vers %s", ping_target)
+
                 # Programmer le prochain ping
                 self._start_keepalive()
                 
@@ -381,9 +619,18 @@ class IRCClient(irc.bot.SingleServerIRCBot):
     
     def on_pong(self, connection, event):
         """Gestionnaire pour les réponses PONG du serveur."""
+        self._pings_without_pong = 0
         if self.last_ping_time > 0:
-            response_time = time.time() - self.last_ping_time
-            self.logger.debug(f"PONG reçu en {response_time:.2f}s")
+            # monotonic: un ajustement NTP ne peut pas fausser le RTT
+            rtt = time.monotonic() - self.last_ping_time
+            # Estimateur Jacobson/Karels: moyenne lissée + variance du RTT
+            if self._rtt_srtt == 0.0:
+                self._rtt_srtt = rtt
+                self._rtt_var = rtt / 2
+            else:
+                self._rtt_var = 0.75 * self._rtt_var + 0.25 * abs(rtt - self._rtt_srtt)
+                self._rtt_srtt = 0.875 * self._rtt_srtt + 0.125 * rtt
+            self.logger.debug("PONG reçu en %.2fs (srtt=%.2fs)", rtt, self._rtt_srtt)
         else:
             self.logger.debug("PONG reçu")
     
@@ -1,12 +1,22 @@
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
 from datetime import datetime
 
+# Garde d'idempotence: un second appel à setup_logging ne doit pas rouvrir
+# les fichiers de log ni dupliquer les handlers (chaque doublon = double I/O)
+_logging_configured = False
+
 
 def setup_logging(log_level=logging.INFO):
     """Configure le système de logging avec rotation des fichiers."""
-    
+    global _logging_configured
+    if _logging_configured:
+        return logging.getLogger()
+    _logging_configured = True
+
     # Créer le dossier logs s'il n'existe pas
     log_dir = 'logs'
     if not os.path.exists(log_dir):
@@ -57,11 +67,18 @@ def setup_logging(log_level=logging.INFO):
     moderation_handler.setLevel(logging.WARNING)
     moderation_handler.setFormatter(log_format)
     
-    # Ajouter les handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    logger.addHandler(error_handler)
-    logger.addHandler(moderation_handler)
+    # Logging non bloquant: le thread appelant (réacteur IRC) ne fait
+    # qu'empiler le LogRecord; un thread d'écoute formate et écrit sur
+    # disque. File bornée pour borner la mémoire sous rafale.
+    log_queue = queue.Queue(maxsize=10000)
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, error_handler,
+        moderation_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
     
     # Logger spécifique pour les statistiques IRC
     irc_logger = logging.getLogger('irc_stats')
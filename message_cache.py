@@ -1,42 +1,80 @@
 import hashlib
 import json
+import re
 import time
+from collections import OrderedDict
 from typing import Optional, Tuple
 import logging
 
+# Précompilée une fois: écrase les suites d'espaces en un seul passage
+_WS_RE = re.compile(r'\s+')
+
+# Logger de module partagé par toutes les instances
+logger = logging.getLogger(__name__)
+
 
 class MessageCache:
+    # __slots__: accès attribut plus rapide pour les compteurs incrémentés
+    # à chaque message, et pas de __dict__ par instance
+    __slots__ = ('cache', 'cache_duration', 'max_cache_size', 'logger',
+                 'cache_hits', 'cache_misses', 'total_savings',
+                 '_puts_since_cleanup')
+
     def __init__(self, cache_duration_hours=24, max_cache_size=1000):
-        self.cache = {}
+        # OrderedDict en mode LRU: hit -> move_to_end, éviction -> popitem
+        # côté ancien, en O(1) au lieu d'un tri périodique
+        self.cache = OrderedDict()
         self.cache_duration = cache_duration_hours * 3600  # Convert to seconds
         self.max_cache_size = max_cache_size
-        self.logger = logging.getLogger(__name__)
+        self.logger = logger
         
         # Statistiques
         self.cache_hits = 0
         self.cache_misses = 0
         self.total_savings = 0.0
 
-    def _hash_message(self, message: str) -> str:
+        # Amortissement du balayage TTL: un passage tous les 64 puts au plus
+        self._puts_since_cleanup = 0
+
+    def _hash_message(self, message: str) -> bytes:
         """Créé un hash du message pour la clé de cache."""
-        # Normaliser le message (minuscules, espaces nettoyés)
-        normalized = ' '.join(message.lower().strip().split())
-        return hashlib.md5(normalized.encode('utf-8')).hexdigest()
+        # Normaliser le message (minuscules, espaces nettoyés) en un passage,
+        # sans la liste intermédiaire de split(); casefold couvre l'Unicode
+        normalized = _WS_RE.sub(' ', message.strip()).casefold()
+        # BLAKE2b est plus rapide que MD5 sur les lignes IRC courtes; le
+        # digest brut (16 octets) suffit comme clé de dict
+        return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).digest()
+
+    # Bornes de taille cachable: sous 8 caractères le hash coûte plus cher
+    # que ce qu'il économise, au-delà de 4096 un collage a peu de chances
+    # de se répéter à l'identique
+    MIN_CACHEABLE_LEN = 8
+    MAX_CACHEABLE_LEN = 4096
+
+    def _is_cacheable(self, message: str) -> bool:
+        return self.MIN_CACHEABLE_LEN <= len(message) <= self.MAX_CACHEABLE_LEN
 
     def get(self, message: str) -> Optional[Tuple[bool, float]]:
         """Récupère un résultat du cache s'il existe et est valide."""
+        if not self._is_cacheable(message):
+            self.cache_misses += 1
+            return None
+
         key = self._hash_message(message)
         
         if key in self.cache:
-            cached_data = self.cache[key]
-            current_time = time.time()
-            
+            timestamp, is_adult_content, confidence_score = self.cache[key]
+            # monotonic: insensible aux sauts NTP de l'horloge murale
+            current_time = time.monotonic()
+
             # Vérifier si le cache n'a pas expiré
-            if current_time - cached_data['timestamp'] <= self.cache_duration:
+            if current_time - timestamp <= self.cache_duration:
+                self.cache.move_to_end(key)
                 self.cache_hits += 1
                 self.total_savings += 0.0001  # Coût réduit avec API Moderation gratuite
-                self.logger.debug(f"Cache HIT pour message: {message[:50]}...")
-                return cached_data['is_adult_content'], cached_data['confidence_score']
+                # Formatage %-différé: rien n'est construit si DEBUG est coupé
+                self.logger.debug("Cache HIT pour message: %.50s...", message)
+                return is_adult_content, confidence_score / 100.0
             else:
                 # Nettoyer l'entrée expirée
                 del self.cache[key]
@@ -46,48 +84,52 @@ class MessageCache:
 
     def put(self, message: str, is_adult_content: bool, confidence_score: float):
         """Stocke un résultat dans le cache."""
+        if not self._is_cacheable(message):
+            return
+
         key = self._hash_message(message)
-        
-        # Nettoyage si le cache est plein
-        if len(self.cache) >= self.max_cache_size:
-            self._cleanup_old_entries()
-        
-        self.cache[key] = {
-            'is_adult_content': is_adult_content,
-            'confidence_score': confidence_score,
-            'timestamp': time.time()
-        }
-        
-        self.logger.debug(f"Cache MISS - Stockage pour: {message[:50]}...")
+
+        # Tuple (timestamp, verdict, score): ~3x plus compact qu'un dict par
+        # entrée. Le score est quantifié sur 0-100: un petit int CPython est
+        # partagé, pas un PyFloat alloué par entrée, et la précision au
+        # centième suffit largement pour un seuil de modération.
+        self.cache[key] = (time.monotonic(), is_adult_content,
+                           int(confidence_score * 100))
+        self.cache.move_to_end(key)
+
+        # Éviction LRU en O(1): retirer côté ancien tant qu'on dépasse la taille
+        if len(self.cache) > self.max_cache_size:
+            # Balayage TTL amorti: au plus un tous les 64 puts, la borne de
+            # taille stricte étant déjà garantie par le popitem ci-dessous
+            self._puts_since_cleanup += 1
+            if self._puts_since_cleanup >= 64:
+                self._puts_since_cleanup = 0
+                self._cleanup_old_entries()
+            while len(self.cache) > self.max_cache_size:
+                self.cache.popitem(last=False)
+
+        self.logger.debug("Cache MISS - Stockage pour: %.50s...", message)
 
     def _cleanup_old_entries(self):
-        """Nettoie les entrées les plus anciennes du cache."""
-        current_time = time.time()
-        
-        # Supprimer les entrées expirées
-        expired_keys = [
-            key for key, data in self.cache.items()
-            if current_time - data['timestamp'] > self.cache_duration
-        ]
-        
-        for key in expired_keys:
-            del self.cache[key]
-        
-        # Si encore trop d'entrées, supprimer les plus anciennes
-        if len(self.cache) >= self.max_cache_size:
-            sorted_entries = sorted(
-                self.cache.items(),
-                key=lambda x: x[1]['timestamp']
-            )
-            
-            # Garder seulement les 80% les plus récentes
-            keep_count = int(self.max_cache_size * 0.8)
-            entries_to_remove = sorted_entries[:-keep_count]
-            
-            for key, _ in entries_to_remove:
-                del self.cache[key]
-        
-        self.logger.info(f"Cache nettoyé, {len(self.cache)} entrées restantes")
+        """
+        Balaye les entrées expirées en tête du cache (TTL).
+        L'OrderedDict est ordonné du moins au plus récemment utilisé: on
+        dépile depuis la tête jusqu'à la première entrée encore valide,
+        soit O(k) pour k expirées au lieu d'un scan complet.
+        """
+        current_time = time.monotonic()
+        removed = 0
+
+        while self.cache:
+            oldest_key = next(iter(self.cache))
+            if current_time - self.cache[oldest_key][0] > self.cache_duration:
+                del self.cache[oldest_key]
+                removed += 1
+            else:
+                break
+
+        if removed:
+            self.logger.info("Cache nettoyé, %d entrées restantes", len(self.cache))
 
     def get_stats(self) -> dict:
         """Retourne les statistiques du cache."""
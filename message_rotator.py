@@ -1,23 +1,52 @@
 import random
 import logging
+import time
+from collections import deque
 from datetime import datetime
 from typing import List, Dict
 
 
 class MessageRotator:
+    # __slots__: instance longue durée au jeu d'attributs stable,
+    # pas de __dict__ et accès attribut par offset direct
+    __slots__ = ('config', 'logger', 'redirect_channel', 'max_history',
+                 'message_history', '_history_set', '_hour_cache',
+                 'base_redirect_messages', 'base_welcome_messages',
+                 '_redirect_buckets', '_welcome_buckets',
+                 '_all_redirect_by_bucket', '_all_welcome_by_bucket',
+                 '_stats_template')
+
+    # Table heure -> tranche horaire, indexée directement par datetime.hour:
+    # matin=0, midi=1, après-midi=2, soirée=3, nuit=4
+    _HOUR_TO_BUCKET = (
+        4, 4, 4, 4, 4, 4,        # 0h-5h: nuit
+        0, 0, 0, 0, 0, 0,        # 6h-11h: matin
+        1, 1,                    # 12h-13h: midi
+        2, 2, 2, 2,              # 14h-17h: après-midi
+        3, 3, 3, 3,              # 18h-21h: soirée
+        4, 4                     # 22h-23h: nuit
+    )
+
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger(__name__)
         self.redirect_channel = config['irc']['redirect_channel']
-        
-        # Historique des messages utilisés pour éviter les répétitions
-        self.message_history = []
+
+        # Historique des messages utilisés pour éviter les répétitions:
+        # deque bornée pour l'ordre (append O(1), pas de pop(0) en O(n))
+        # + set compagnon pour le test d'appartenance en O(1)
         self.max_history = 10  # Éviter la répétition des 10 derniers messages
-        
+        self.message_history = deque(maxlen=self.max_history)
+        self._history_set = set()
+
+        # Cache de l'heure courante (rafraîchi au plus une fois par minute):
+        # évite une construction datetime par message modéré
+        self._hour_cache = (float('-inf'), 0)
+
         # Messages de base (seront complétés par les messages temporels)
         self.base_redirect_messages = [
             f"🐒 @{{user}}, je t'emmène sur {self.redirect_channel} pour ce genre de discussion ! 😉",
-            f"🔥 @{{user}}, hop direction {self.redirect_channel} pour les sujets chauds ! 🌶️", 
+            f"🔥 @{{user}}, hop direction {self.redirect_channel} pour les sujets chauds ! 🌶️",
             f"😊 @{{user}}, {self.redirect_channel} sera parfait pour continuer cette conversation !",
             f"🐒 @{{user}}, allez zou ! {self.redirect_channel} t'attend pour parler de ça ! 😄",
             f"🌶️ @{{user}}, ce sujet a sa place sur {self.redirect_channel} ! On y va ? 😊",
@@ -25,7 +54,7 @@ class MessageRotator:
             f"🎯 @{{user}}, {self.redirect_channel} est le bon endroit pour ça ! Je t'y emmène ! 🚀",
             f"💫 @{{user}}, direction {self.redirect_channel} pour approfondir le sujet ! ✨"
         ]
-        
+
         # Messages d'accueil de base
         self.base_welcome_messages = [
             f"🐒 Salut {{user}} ! Tu peux parler librement de sujets adultes ici, c'est fait pour ça ! 😊",
@@ -37,118 +66,141 @@ class MessageRotator:
             f"🔓 Hey {{user}} ! Zone libre activée sur {self.redirect_channel} ! Parle sans contraintes ! 🎊"
         ]
 
-    def get_redirect_message(self, user: str, context: str = None) -> str:
-        """Retourne un message de redirection en évitant les répétitions."""
-        current_hour = datetime.now().hour
-        
-        # Ajouter des messages contextuels selon l'heure
-        time_specific_messages = self._get_time_specific_redirect_messages(current_hour)
-        
-        # Combiner les messages de base et temporels
-        all_messages = self.base_redirect_messages + time_specific_messages
-        
-        # Filtrer les messages récemment utilisés
-        available_messages = [
-            msg for msg in all_messages 
-            if msg not in self.message_history
-        ]
-        
-        # Si tous les messages ont été utilisés récemment, réinitialiser l'historique
-        if not available_messages:
-            available_messages = all_messages
-            self.message_history.clear()
-        
-        # Choisir un message au hasard
-        chosen_message = random.choice(available_messages)
-        
-        # Ajouter à l'historique
-        self.message_history.append(chosen_message)
-        if len(self.message_history) > self.max_history:
-            self.message_history.pop(0)
-        
-        return chosen_message.format(user=user)
-
-    def get_welcome_message(self, user: str) -> str:
-        """Retourne un message d'accueil contextuel."""
-        current_hour = datetime.now().hour
-        
-        # Ajouter des messages contextuels selon l'heure
-        time_specific_messages = self._get_time_specific_welcome_messages(current_hour)
-        
-        # Combiner les messages de base et temporels
-        all_messages = self.base_welcome_messages + time_specific_messages
-        
-        # Sélection aléatoire
-        chosen_message = random.choice(all_messages)
-        
-        return chosen_message.format(user=user)
-
-    def _get_time_specific_redirect_messages(self, hour: int) -> List[str]:
-        """Retourne des messages de redirection adaptés à l'heure."""
+        # Pré-calculer une fois pour toutes les messages par tranche horaire,
+        # ainsi que leur concaténation avec les messages de base: plus aucune
+        # interpolation ni construction de liste par appel
         redirect_channel = self.redirect_channel
-        
-        if 6 <= hour < 12:  # Matin
-            return [
+        self._redirect_buckets = (
+            [  # Matin
                 f"☀️ @{{user}}, pour bien commencer la journée, direction {redirect_channel} ! 🌅",
                 f"🌤️ @{{user}}, matinée épicée en vue ? {redirect_channel} t'attend ! ☕"
-            ]
-        elif 12 <= hour < 14:  # Midi  
-            return [
+            ],
+            [  # Midi
                 f"🍽️ @{{user}}, pause déjeuner coquine ? {redirect_channel} pour l'apéritif ! 🥂",
                 f"☀️ @{{user}}, midi bien chaud ! Direction {redirect_channel} ! 🌡️"
-            ]
-        elif 14 <= hour < 18:  # Après-midi
-            return [
+            ],
+            [  # Après-midi
                 f"🌞 @{{user}}, l'après-midi se réchauffe ! {redirect_channel} pour la suite ! 🔥",
                 f"☕ @{{user}}, pause café épicée ? {redirect_channel} est parfait ! ☕"
-            ]
-        elif 18 <= hour < 22:  # Soirée
-            return [
+            ],
+            [  # Soirée
                 f"🌆 @{{user}}, soirée qui commence bien ! {redirect_channel} pour la détente ! 🍷",
                 f"🔥 @{{user}}, l'apéro se corse ! {redirect_channel} pour continuer ! 🍻"
-            ]
-        else:  # Nuit (22h-6h)
-            return [
+            ],
+            [  # Nuit (22h-6h)
                 f"🌙 @{{user}}, nuit coquine en perspective ? {redirect_channel} t'accueille ! ✨",
                 f"🌟 @{{user}}, les nuits sont faites pour ça ! Direction {redirect_channel} ! 🌛"
             ]
+        )
 
-    def _get_time_specific_welcome_messages(self, hour: int) -> List[str]:
-        """Retourne des messages d'accueil adaptés à l'heure."""
-        redirect_channel = self.redirect_channel
-        
-        if 6 <= hour < 12:  # Matin
-            return [
+        self._welcome_buckets = (
+            [  # Matin
                 f"🌅 Bonjour {{user}} ! {redirect_channel} pour un réveil en douceur ! ☀️",
                 f"☕ Salut {{user}} ! Café et discussions libres sur {redirect_channel} ! 🌤️"
-            ]
-        elif 12 <= hour < 14:  # Midi
-            return [
+            ],
+            [  # Midi
                 f"🍽️ Bon appétit {{user}} ! {redirect_channel} pour digérer en beauté ! 😋",
                 f"🥂 {{user}}, pause déjeuner détente sur {redirect_channel} ! Santé ! 🍷"
-            ]
-        elif 14 <= hour < 18:  # Après-midi
-            return [
+            ],
+            [  # Après-midi
                 f"☀️ {{user}}, {redirect_channel} pour une après-midi détendue ! 🌞",
                 f"☕ Bienvenue {{user}} ! {redirect_channel} pour ta pause bien méritée ! 😌"
-            ]
-        elif 18 <= hour < 22:  # Soirée
-            return [
+            ],
+            [  # Soirée
                 f"🌆 Bonsoir {{user}} ! {redirect_channel} pour une soirée décontractée ! 🍷",
                 f"🔥 {{user}}, soirée sympa en vue sur {redirect_channel} ! Profite bien ! 🎉"
-            ]
-        else:  # Nuit
-            return [
+            ],
+            [  # Nuit
                 f"🌙 Bonsoir {{user}} ! {redirect_channel} pour des nuits étoilées ! ✨",
                 f"🌟 {{user}}, nuit libre sur {redirect_channel} ! Fais-toi plaisir ! 🌛"
             ]
+        )
+
+        # Chaque template contient exactement un {user}: le découper une fois
+        # en (préfixe, suffixe) et concaténer à l'envoi évite toute la
+        # machinerie str.format par message
+        self._all_redirect_by_bucket = tuple(
+            tuple(tuple(m.split('{user}', 1)) for m in self.base_redirect_messages + bucket)
+            for bucket in self._redirect_buckets
+        )
+        self._all_welcome_by_bucket = tuple(
+            tuple(tuple(m.split('{user}', 1)) for m in self.base_welcome_messages + bucket)
+            for bucket in self._welcome_buckets
+        )
+
+        # Partie constante des stats, construite une seule fois
+        self._stats_template = {
+            'total_redirect_messages': len(self.base_redirect_messages),
+            'total_welcome_messages': len(self.base_welcome_messages),
+            'max_history_size': self.max_history
+        }
+
+    def _current_hour(self) -> int:
+        """Heure courante, mémorisée avec un TTL de 60s sur l'horloge monotone."""
+        now = time.monotonic()
+        ts, hour = self._hour_cache
+        if now - ts > 60.0:
+            hour = datetime.now().hour
+            self._hour_cache = (now, hour)
+        return hour
+
+    def get_redirect_message(self, user: str) -> str:
+        """Retourne un message de redirection en évitant les répétitions."""
+        current_hour = self._current_hour()
+
+        # Pool pré-calculé (base + messages temporels) pour cette tranche horaire
+        all_messages = self._all_redirect_by_bucket[self._HOUR_TO_BUCKET[current_hour]]
+
+        # Choisir uniformément parmi les messages non récents en un seul
+        # passage (échantillonnage réservoir): pas de liste intermédiaire
+        history_set = self._history_set
+        chosen_message = None
+        eligible = 0
+        for msg in all_messages:
+            if msg not in history_set:
+                eligible += 1
+                if random.randrange(eligible) == 0:
+                    chosen_message = msg
+
+        # Si tous les messages ont été utilisés récemment, réinitialiser l'historique
+        if chosen_message is None:
+            self.message_history.clear()
+            history_set.clear()
+            chosen_message = random.choice(all_messages)
+
+        # Ajouter à l'historique (la deque bornée éjecte le plus ancien)
+        if len(self.message_history) == self.max_history:
+            self._history_set.discard(self.message_history[0])
+        self.message_history.append(chosen_message)
+        self._history_set.add(chosen_message)
+
+        # chosen_message est une paire (préfixe, suffixe): simple concaténation
+        return chosen_message[0] + user + chosen_message[1]
+
+    def get_welcome_message(self, user: str) -> str:
+        """Retourne un message d'accueil contextuel."""
+        current_hour = self._current_hour()
+
+        # Pool pré-calculé pour cette tranche horaire
+        all_messages = self._all_welcome_by_bucket[self._HOUR_TO_BUCKET[current_hour]]
+
+        # Sélection aléatoire
+        chosen_message = random.choice(all_messages)
+
+        return chosen_message[0] + user + chosen_message[1]
+
+    def _get_time_specific_redirect_messages(self, hour: int) -> List[str]:
+        """Retourne des messages de redirection adaptés à l'heure."""
+        return self._redirect_buckets[self._HOUR_TO_BUCKET[hour]]
+
+    def _get_time_specific_welcome_messages(self, hour: int) -> List[str]:
+        """Retourne des messages d'accueil adaptés à l'heure."""
+        return self._welcome_buckets[self._HOUR_TO_BUCKET[hour]]
 
     def get_stats(self) -> Dict:
         """Retourne les statistiques du rotateur de messages."""
         return {
-            'total_redirect_messages': len(self.base_redirect_messages),
-            'total_welcome_messages': len(self.base_welcome_messages),
+            **self._stats_template,
             'recent_messages_used': len(self.message_history),
-            'max_history_size': self.max_history,
-            'current_hour': datetime.now().hour
-        }
\ No newline at end of file
+            'current_hour': self._current_hour()
+        }
@@ -1,13 +1,23 @@
 import logging
+import sched
+import threading
 import time
-from datetime import datetime, timedelta
-from typing import Dict, List
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict
 from content_analyzer import ContentAnalyzer
 from message_rotator import MessageRotator
 from phone_moderator import PhoneModerator
 
 
 class ModerationHandler:
+    # __slots__: instance unique longue durée, attributs fixés dans __init__
+    __slots__ = ('config', 'logger', 'content_analyzer', 'message_rotator',
+                 'phone_moderator', 'user_violations', 'reset_hours',
+                 'cooldown_minutes', 'move_delay', 'welcome_delay',
+                 '_cooldown_s', '_reset_s', 'last_action',
+                 '_scheduler', '_scheduler_wakeup')
+
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger(__name__)
@@ -15,17 +25,53 @@ class ModerationHandler:
         self.message_rotator = MessageRotator(config)
         self.phone_moderator = PhoneModerator(config)
         
-        # Stockage des infractions par utilisateur
-        self.user_violations: Dict[str, List[datetime]] = {}
-        
+        # Stockage des infractions par utilisateur: deques triées par ordre
+        # d'arrivée, le nettoyage ne dépile que le préfixe expiré.
+        # Timestamps epoch (float): la soustraction est une simple opération
+        # flottante, pas d'objets datetime/timedelta alloués sur le chemin chaud
+        self.user_violations: Dict[str, Deque[float]] = {}
+
         # Configuration de modération
         self.reset_hours = config['moderation']['reset_hours']
         self.cooldown_minutes = config['moderation']['cooldown_minutes']
         self.move_delay = config['moderation'].get('move_delay_seconds', 3)
         self.welcome_delay = config['moderation'].get('welcome_delay_seconds', 5)
-        
+
+        # Durées pré-converties en secondes pour les comparaisons directes
+        self._cooldown_s = self.cooldown_minutes * 60.0
+        self._reset_s = self.reset_hours * 3600.0
+
         # Dernière action par utilisateur pour éviter le spam de modération
-        self.last_action: Dict[str, datetime] = {}
+        self.last_action: Dict[str, float] = {}
+
+        # Un seul thread d'arrière-plan pour toutes les actions différées
+        # (déplacements, accueils, bans): plus de threading.Timer qui crée
+        # un thread OS par violation sous rafale
+        self._scheduler = sched.scheduler(time.monotonic, time.sleep)
+        self._scheduler_wakeup = threading.Event()
+        threading.Thread(target=self._run_scheduler, daemon=True,
+                         name='moderation-scheduler').start()
+
+    def _run_scheduler(self):
+        """Boucle du thread unique exécutant les actions différées."""
+        while True:
+            self._scheduler_wakeup.clear()
+            # blocking=False: exécute les actions échues et retourne le délai
+            # jusqu'à la prochaine, ou None si la file est vide
+            next_deadline = self._scheduler.run(blocking=False)
+            self._scheduler_wakeup.wait(timeout=next_deadline)
+
+    def _schedule(self, delay: float, action):
+        """Programme une action différée sur le thread de planification."""
+        self._scheduler.enter(delay, 1, self._run_deferred, (action,))
+        self._scheduler_wakeup.set()
+
+    def _run_deferred(self, action):
+        """Exécute une action différée sans laisser une erreur tuer le thread."""
+        try:
+            action()
+        except Exception as e:
+            self.logger.error(f"Erreur dans une action différée: {e}")
 
     def analyze_message(self, sender: str, message: str, channel: str, irc_connection):
         """Analyse un message et applique les sanctions si nécessaire."""
@@ -53,24 +99,22 @@ class ModerationHandler:
 
     def _can_moderate_user(self, user: str) -> bool:
         """Vérifie si on peut modérer un utilisateur (cooldown)."""
-        if user not in self.last_action:
+        last_action_time = self.last_action.get(user)
+        if last_action_time is None:
             return True
-        
-        last_action_time = self.last_action[user]
-        cooldown = timedelta(minutes=self.cooldown_minutes)
-        
-        return datetime.now() - last_action_time > cooldown
+
+        return time.time() - last_action_time > self._cooldown_s
 
     def _handle_violation(self, user: str, channel: str, irc_connection, confidence_score: float):
         """Gère une violation en déplaçant l'utilisateur vers #adultes."""
-        current_time = datetime.now()
+        current_time = time.time()
         
         # Nettoyer les anciennes violations
         self._clean_old_violations(user, current_time)
         
         # Ajouter la nouvelle violation
         if user not in self.user_violations:
-            self.user_violations[user] = []
+            self.user_violations[user] = deque()
         self.user_violations[user].append(current_time)
         
         violation_count = len(self.user_violations[user])
@@ -83,19 +127,20 @@ class ModerationHandler:
         # Mettre à jour le timestamp de la dernière action
         self.last_action[user] = current_time
 
-    def _clean_old_violations(self, user: str, current_time: datetime):
+    def _clean_old_violations(self, user: str, current_time: float):
         """Supprime les violations anciennes (reset après 24h)."""
-        if user not in self.user_violations:
+        violations = self.user_violations.get(user)
+        if violations is None:
             return
-        
-        reset_threshold = current_time - timedelta(hours=self.reset_hours)
-        self.user_violations[user] = [
-            violation_time for violation_time in self.user_violations[user]
-            if violation_time > reset_threshold
-        ]
-        
+
+        # Les timestamps sont croissants: il suffit de dépiler le préfixe
+        # expiré (O(k) pour k entrées expirées, pas de reconstruction de liste)
+        reset_threshold = current_time - self._reset_s
+        while violations and violations[0] <= reset_threshold:
+            violations.popleft()
+
         # Supprimer l'utilisateur s'il n'a plus de violations récentes
-        if not self.user_violations[user]:
+        if not violations:
             del self.user_violations[user]
             if user in self.last_action:
                 del self.last_action[user]
@@ -103,12 +148,10 @@ class ModerationHandler:
 
     def _redirect_to_adultes(self, user: str, channel: str, irc_connection):
         """Déplace un utilisateur vers le canal de redirection de manière sympathique."""
-        import threading
-        
         # Message sympathique et varié avant le déplacement
         redirect_msg = self.message_rotator.get_redirect_message(user)
         irc_connection.privmsg(channel, redirect_msg)
-        
+
         # Programmer le déplacement après quelques secondes
         def move_user():
             success = irc_connection.move_user_to_adultes(user, f"Discussion plus appropriée sur {irc_connection.redirect_channel} 😊")
@@ -117,17 +160,15 @@ class ModerationHandler:
                 def send_welcome():
                     welcome_msg = self.message_rotator.get_welcome_message(user)
                     irc_connection.send_message(irc_connection.redirect_channel, welcome_msg)
-                
-                threading.Timer(self.welcome_delay, send_welcome).start()
-        
-        threading.Timer(self.move_delay, move_user).start()
+
+                self._schedule(self.welcome_delay, send_welcome)
+
+        self._schedule(self.move_delay, move_user)
         
         self.logger.info(f"Redirection programmée pour {user} vers {irc_connection.redirect_channel}")
     
     def _handle_phone_violation(self, user: str, channel: str, irc_connection, phone_action: dict):
         """Gère une violation de numéro de téléphone."""
-        import threading
-        
         action_type = phone_action['action']
         message = phone_action['message']
         numbers = phone_action['numbers']
@@ -158,21 +199,21 @@ class ModerationHandler:
                     self.logger.error(f"Erreur lors du ban de {user}: {e}")
             
             # Appliquer le ban après 3 secondes
-            threading.Timer(3.0, apply_ban).start()
+            self._schedule(3.0, apply_ban)
 
     def get_user_status(self, user: str) -> Dict:
         """Retourne le statut d'un utilisateur pour debugging."""
-        current_time = datetime.now()
-        self._clean_old_violations(user, current_time)
-        
-        violation_count = len(self.user_violations.get(user, []))
+        self._clean_old_violations(user, time.time())
+
+        violation_count = len(self.user_violations.get(user, ()))
         last_action = self.last_action.get(user)
         can_moderate = self._can_moderate_user(user)
-        
+
+        # Conversion en datetime uniquement pour l'affichage
         return {
             'user': user,
             'violation_count': violation_count,
-            'last_action': last_action.isoformat() if last_action else None,
+            'last_action': datetime.fromtimestamp(last_action).isoformat() if last_action else None,
             'can_moderate': can_moderate,
-            'violations': [v.isoformat() for v in self.user_violations.get(user, [])]
+            'violations': [datetime.fromtimestamp(v).isoformat() for v in self.user_violations.get(user, ())]
         }
\ No newline at end of file
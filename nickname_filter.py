@@ -3,13 +3,23 @@ Module de filtrage des pseudos inappropriés pour la modération automatique
 Détection des pseudos contenant du contenu adulte et redirection vers #adultes
 """
 
-import re
 import logging
 import time
+from collections import OrderedDict
 from typing import List, Tuple, Optional
 
 
 class NicknameFilter:
+    # __slots__: accès attribut par offset direct dans check_nickname
+    # (appelé à chaque JOIN) et pas de __dict__ par instance
+    __slots__ = ('config', 'logger', 'inappropriate_patterns', '_scan_cache',
+                 '_scan_cache_max', '_substr_patterns', '_pattern_set',
+                 '_pattern_char_set', 'enabled', 'monitored_channels',
+                 'redirect_channel', 'send_messages', 'log_detections',
+                 'monitored_channel', 'smart_welcome_messages',
+                 'detections_count', 'redirected_users',
+                 '_redirected_users_max', '_patterns_dirty')
+
     def __init__(self, config: dict):
         self.config = config
         self.logger = logging.getLogger(__name__)
@@ -51,9 +61,13 @@ class NicknameFilter:
             "*branlette*"
         ]
         
-        # Pré-compiler tous les patterns regex pour une détection ultra-rapide
-        self.compiled_patterns = []
-        self.pattern_cache = {}  # Cache pour éviter recompilation
+        # Cache LRU des résultats de scan: les mêmes pseudos reviennent sans
+        # cesse (JOIN/PART répétés), inutile de les re-scanner à chaque fois.
+        # Invalidé par add_pattern/remove_pattern.
+        self._scan_cache = OrderedDict()
+        self._scan_cache_max = 4096
+
+        # Pré-découper tous les patterns en sous-chaînes à rechercher
         self._compile_patterns_optimized()
         
         # Configuration du filtre
@@ -82,9 +96,11 @@ class NicknameFilter:
             'default': "👋 Bienvenue ! Votre pseudo contient du contenu adulte, vous êtes donc automatiquement dirigé vers cet espace approprié. 🔞"
         }
         
-        # Statistiques
+        # Statistiques. redirected_users est un LRU borné: sur un bot qui
+        # tourne des mois, un set qui ne fait que grossir est une fuite mémoire
         self.detections_count = 0
-        self.redirected_users = set()
+        self.redirected_users = OrderedDict()
+        self._redirected_users_max = 10000
         
         status = "activé" if self.enabled else "désactivé"
         self.logger.info(f"Filtre de pseudos {status} avec {len(self.inappropriate_patterns)} patterns sur {self.monitored_channels}")
@@ -92,37 +108,44 @@ class NicknameFilter:
         self.logger.info(f"Messages d'accueil personnalisés: {len(self.smart_welcome_messages)-1} patterns + défaut")
 
     def _compile_patterns_optimized(self):
-        """Compile les patterns en expressions régulières optimisées pour pseudos."""
+        """Découpe les patterns *a*b* en sous-chaînes pour une recherche sans regex."""
         compilation_start = time.time()
-        compiled_count = 0
-        
-        # Tous les patterns de pseudos ont des wildcards, optimisons différemment
-        # Grouper par préfixe/suffixe commun pour optimisation
-        
+
+        # Tous les patterns sont de la forme *mot* ou *mot1*mot2*: la regex
+        # est superflue, l'opérateur `in` / str.find (recherche two-way en C)
+        # suffit. On stocke (tokens, pattern_original) dans l'ordre de la
+        # liste pour conserver la priorité des patterns.
+        substr_patterns = []
         for pattern in self.inappropriate_patterns:
-            try:
-                if pattern in self.pattern_cache:
-                    compiled = self.pattern_cache[pattern]
-                else:
-                    if '*' in pattern:
-                        # Pattern avec wildcards : * devient .*? (non-greedy)
-                        escaped = re.escape(pattern).replace('\\*', '.*?')
-                    else:
-                        # Pattern exact : recherche exacte
-                        escaped = re.escape(pattern)
-                    
-                    # Optimisation: compiler avec flags optimisés pour pseudos
-                    compiled = re.compile(escaped, re.IGNORECASE | re.UNICODE)
-                    self.pattern_cache[pattern] = compiled
-                
-                self.compiled_patterns.append((pattern, compiled))
-                compiled_count += 1
-                
-            except re.error as e:
-                self.logger.warning(f"Pattern de pseudo invalide '{pattern}': {e}")
-        
+            tokens = tuple(tok for tok in pattern.lower().split('*') if tok)
+            if not tokens:
+                self.logger.warning(f"Pattern de pseudo invalide '{pattern}': aucune sous-chaîne")
+                continue
+            substr_patterns.append((tokens, pattern))
+        # tuple pour l'itération (layout plus simple que list en CPython),
+        # set parallèle pour les tests d'appartenance en O(1)
+        self._substr_patterns = tuple(substr_patterns)
+        self._pattern_set = set(self.inappropriate_patterns)
+        # Caractères apparaissant dans au moins un token: un pseudo qui n'en
+        # contient aucun ne peut rien matcher, rejet en un seul passage
+        self._pattern_char_set = frozenset(
+            ch for tokens, _ in substr_patterns for tok in tokens for ch in tok
+        )
+        self._scan_cache.clear()
+        self._patterns_dirty = False
+
         compilation_time = time.time() - compilation_start
-        self.logger.info(f"Optimisation regex pseudos: {compiled_count} patterns compilés en {compilation_time:.3f}s")
+        self.logger.info(f"Optimisation patterns pseudos: {len(substr_patterns)} patterns découpés en sous-chaînes en {compilation_time:.3f}s")
+
+    def _match_pattern(self, tokens: tuple, nickname: str) -> bool:
+        """Vérifie que les sous-chaînes apparaissent dans l'ordre dans le pseudo."""
+        pos = 0
+        for token in tokens:
+            pos = nickname.find(token, pos)
+            if pos < 0:
+                return False
+            pos += len(token)
+        return True
     
     def _compile_patterns(self):
         """Ancienne méthode - gardée pour compatibilité."""
@@ -140,23 +163,51 @@ class NicknameFilter:
         """
         if not nickname or not nickname.strip() or not self.enabled:
             return False, None
+
+        # Reconstruction paresseuse après add_pattern/remove_pattern: un lot
+        # de modifications ne redécoupe les patterns qu'une seule fois
+        if self._patterns_dirty:
+            self._compile_patterns_optimized()
         
         # Normaliser le pseudo (supprimer les caractères spéciaux IRC si besoin)
         normalized_nickname = nickname.lower().strip()
-        
-        # Tester chaque pattern
-        for original_pattern, compiled_pattern in self.compiled_patterns:
-            try:
-                if compiled_pattern.search(normalized_nickname):
-                    self.detections_count += 1
-                    if self.log_detections:
-                        self.logger.warning(f"Pseudo inapproprié détecté: '{nickname}' correspond au pattern '{original_pattern}'")
-                    return True, original_pattern
-                    
-            except Exception as e:
-                self.logger.error(f"Erreur lors de la vérification du pattern '{original_pattern}' sur '{nickname}': {e}")
-                continue
-        
+
+        # Cache LRU: le résultat du scan est pur, seuls le compteur et le
+        # log restent hors cache pour compter chaque détection
+        cache = self._scan_cache
+        result = cache.get(normalized_nickname)
+        if result is not None:
+            cache.move_to_end(normalized_nickname)
+        else:
+            result = self._scan_nickname(normalized_nickname)
+            cache[normalized_nickname] = result
+            if len(cache) > self._scan_cache_max:
+                cache.popitem(last=False)
+
+        is_inappropriate, original_pattern = result
+        if is_inappropriate:
+            self.detections_count += 1
+            if self.log_detections:
+                self.logger.warning(f"Pseudo inapproprié détecté: '{nickname}' correspond au pattern '{original_pattern}'")
+        return result
+
+    def _scan_nickname(self, normalized_nickname: str) -> Tuple[bool, Optional[str]]:
+        """Scan brut du pseudo normalisé (sans compteur ni log)."""
+        # Rejet rapide: aucun caractère des patterns dans le pseudo
+        # (isdisjoint itère la chaîne en C, sans set intermédiaire)
+        if self._pattern_char_set.isdisjoint(normalized_nickname):
+            return False, None
+
+        # Recherche de sous-chaînes pure (pas de moteur regex): le cas
+        # courant *mot* se réduit à un simple `in` en C
+        for tokens, original_pattern in self._substr_patterns:
+            if len(tokens) == 1:
+                matched = tokens[0] in normalized_nickname
+            else:
+                matched = self._match_pattern(tokens, normalized_nickname)
+            if matched:
+                return True, original_pattern
+
         return False, None
 
     def handle_inappropriate_nickname(self, irc_client, user: str, channel: str, detected_pattern: str):
@@ -227,8 +278,11 @@ class NicknameFilter:
                     explanation_msg = f"ℹ️ {user} a été exclu à cause de son pseudo inapproprié. Il peut rejoindre {self.redirect_channel} pour discuter."
                     irc_client.send_message(channel, explanation_msg)
             
-            # Enregistrer la redirection
-            self.redirected_users.add(user)
+            # Enregistrer la redirection (éviction du plus ancien si plein)
+            self.redirected_users[user] = None
+            self.redirected_users.move_to_end(user)
+            if len(self.redirected_users) > self._redirected_users_max:
+                self.redirected_users.popitem(last=False)
             
             return True
             
@@ -275,27 +329,23 @@ class NicknameFilter:
 
     def add_pattern(self, pattern: str):
         """Ajoute un nouveau pattern à la liste."""
-        if pattern not in self.inappropriate_patterns:
-            self.inappropriate_patterns.append(pattern)
-            try:
-                if '*' in pattern:
-                    escaped = re.escape(pattern).replace('\\*', '.*?')
-                else:
-                    escaped = re.escape(pattern)
-                compiled = re.compile(escaped, re.IGNORECASE | re.UNICODE)
-                self.compiled_patterns.append((pattern, compiled))
-                self.logger.info(f"Nouveau pattern de pseudo ajouté: {pattern}")
-                return True
-            except re.error as e:
-                self.logger.error(f"Impossible d'ajouter le pattern de pseudo '{pattern}': {e}")
+        if pattern not in self._pattern_set:
+            if not any(tok for tok in pattern.lower().split('*') if tok):
+                self.logger.error(f"Impossible d'ajouter le pattern de pseudo '{pattern}': aucune sous-chaîne")
                 return False
+            self.inappropriate_patterns.append(pattern)
+            self._pattern_set.add(pattern)
+            self._patterns_dirty = True
+            self.logger.info(f"Nouveau pattern de pseudo ajouté: {pattern}")
+            return True
         return False
 
     def remove_pattern(self, pattern: str):
         """Supprime un pattern de la liste."""
-        if pattern in self.inappropriate_patterns:
+        if pattern in self._pattern_set:
             self.inappropriate_patterns.remove(pattern)
-            self.compiled_patterns = [(p, c) for p, c in self.compiled_patterns if p != pattern]
+            self._pattern_set.discard(pattern)
+            self._patterns_dirty = True
             self.logger.info(f"Pattern de pseudo supprimé: {pattern}")
             return True
         return False
\ No newline at end of file
@@ -4,11 +4,25 @@ Modérateur de numéros de téléphone pour AlphaBaboon.
 Système d'avertissement progressif et ban automatique.
 """
 
+import sys
 import time
 import logging
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 from phone_number_detector import PhoneNumberDetector
 
+# Même table que le détecteur: compter les chiffres via translate (en C)
+_DIGIT_DELETE_TABLE = str.maketrans('', '', '0123456789')
+
+
+@dataclass(slots=True)
+class UserViolation:
+    """Historique de violations d'un utilisateur (accès par slot, pas un dict)."""
+    warnings: int = 0
+    numbers: List[str] = field(default_factory=list)
+    last_violation: float = 0.0
+    banned_until: float = 0.0
+
 
 class PhoneModerator:
     def __init__(self, config):
@@ -17,7 +31,12 @@ class PhoneModerator:
         self.detector = PhoneNumberDetector()
         
         # Historique des violations par utilisateur
-        self.user_violations = {}  # {username: {'warnings': count, 'numbers': [list], 'last_violation': timestamp}}
+        self.user_violations: Dict[str, UserViolation] = {}
+
+        # Balayage périodique: sans lui, chaque pseudo fautif resterait dans
+        # le dict pour toute la vie du process
+        self._last_sweep = 0.0
+        self._sweep_interval = 3600.0
         
         # Configuration des avertissements
         self.warning_threshold = config.get('phone_moderation', {}).get('warning_threshold', 1)  # 1 avertissement avant ban
@@ -39,6 +58,25 @@ class PhoneModerator:
             "Sorry {user}, mais règle non respectée = sourdine temporaire sur {channel}. Tu pourras revenir discuter plus tard sans problème ! 😌"
         ]
         
+        # Templates pré-convertis en formatage %-style: la substitution se
+        # fait en un passage C, sans re-parser les {placeholders} à chaque
+        # message (certains templates n'ont pas {channel}, le mapping l'ignore)
+        self._warning_templates = tuple(
+            t.replace('{user}', '%(user)s').replace('{channel}', '%(channel)s')
+            for t in self.warning_messages
+        )
+        self._ban_templates = tuple(
+            t.replace('{user}', '%(user)s').replace('{channel}', '%(channel)s')
+            for t in self.ban_messages
+        )
+        # 4 templates d'avertissement: puissance de deux, la rotation se fait
+        # par masque binaire plutôt que par division
+        self._warn_mask = len(self._warning_templates) - 1
+
+    def _key(self, nick: str) -> str:
+        """Clé de dict pour un pseudo: minuscules internées (comparaison par pointeur)."""
+        return sys.intern(nick.lower())
+
     def check_phone_numbers(self, message: str, sender: str, channel: str) -> Tuple[bool, Optional[dict]]:
         """
         Vérifie si un message contient des numéros de téléphone et retourne l'action à prendre.
@@ -52,17 +90,23 @@ class PhoneModerator:
                 'user_violations': int  # Nombre total de violations
             }
         """
+        # Porte d'entrée du pipeline: moins de 4 chiffres = aucun numéro
+        # possible, on sort sans même toucher au détecteur ni à son cache
+        if len(message) - len(message.translate(_DIGIT_DELETE_TABLE)) < 4:
+            return False, None
+
         numbers = self.detector.detect_phone_numbers(message)
-        
+
         if not numbers:
             return False, None
         
-        # Extraire les numéros nettoyés
+        # Extraire les numéros nettoyés: les numéros sont déjà détectés,
+        # inutile de relancer un scan complet sur chacun
         clean_numbers = []
         detected_numbers = []
         for number, start, end in numbers:
             detected_numbers.append(number)
-            clean_numbers.extend(self.detector.extract_clean_numbers(number))
+            clean_numbers.append(self.detector.clean_one(number))
         
         self.logger.info(f"Numéros détectés de {sender} sur {channel}: {detected_numbers}")
         
@@ -74,90 +118,103 @@ class PhoneModerator:
     def _update_user_violations(self, username: str, numbers: List[str], channel: str) -> dict:
         """Met à jour les violations d'un utilisateur et détermine l'action."""
         current_time = time.time()
-        username_lower = username.lower()
+        username_lower = self._key(username)
+
+        # Purge opportuniste des entrées expirées (au plus une fois par heure)
+        if current_time - self._last_sweep > self._sweep_interval:
+            self._sweep_expired(current_time)
         
         # Initialiser ou récupérer l'historique de l'utilisateur
-        if username_lower not in self.user_violations:
-            self.user_violations[username_lower] = {
-                'warnings': 0,
-                'numbers': [],
-                'last_violation': current_time,
-                'banned_until': 0
-            }
-        
-        user_data = self.user_violations[username_lower]
-        
+        user_data = self.user_violations.get(username_lower)
+        if user_data is None:
+            user_data = UserViolation(last_violation=current_time)
+            self.user_violations[username_lower] = user_data
+
         # Vérifier si les violations précédentes ont expiré
-        if current_time - user_data['last_violation'] > (self.violation_reset_hours * 3600):
+        if current_time - user_data.last_violation > (self.violation_reset_hours * 3600):
             self.logger.info(f"Reset des violations pour {username} (expirées)")
-            user_data['warnings'] = 0
-            user_data['numbers'] = []
-        
+            user_data.warnings = 0
+            user_data.numbers = []
+
         # Vérifier si l'utilisateur est encore banni
-        if current_time < user_data['banned_until']:
-            time_left = int((user_data['banned_until'] - current_time) / 3600)
+        if current_time < user_data.banned_until:
+            time_left = int((user_data.banned_until - current_time) / 3600)
             self.logger.info(f"{username} encore banni pour {time_left}h")
             return {
                 'action': 'none',  # Ne rien faire, déjà banni
                 'message': '',
                 'numbers': numbers,
-                'user_violations': user_data['warnings']
+                'user_violations': user_data.warnings
             }
-        
+
         # Ajouter les nouveaux numéros
-        user_data['numbers'].extend(numbers)
-        user_data['last_violation'] = current_time
-        
+        user_data.numbers.extend(numbers)
+        user_data.last_violation = current_time
+
         # Déterminer l'action selon le nombre d'avertissements
-        if user_data['warnings'] >= self.warning_threshold:
+        if user_data.warnings >= self.warning_threshold:
             # Ban l'utilisateur
-            user_data['banned_until'] = current_time + (self.ban_duration_hours * 3600)
-            
+            user_data.banned_until = current_time + (self.ban_duration_hours * 3600)
+
             ban_message = self._get_ban_message(username, channel)
-            
+
             self.logger.warning(f"Ban de {username} sur {channel} pour {self.ban_duration_hours}h")
-            
+
             return {
                 'action': 'ban',
                 'message': ban_message,
                 'numbers': numbers,
-                'user_violations': user_data['warnings'],
+                'user_violations': user_data.warnings,
                 'ban_duration_hours': self.ban_duration_hours
             }
         else:
             # Avertissement
-            user_data['warnings'] += 1
-            
-            warning_message = self._get_warning_message(username, channel, user_data['warnings'])
-            
-            self.logger.info(f"Avertissement {user_data['warnings']} pour {username} sur {channel}")
-            
+            user_data.warnings += 1
+
+            warning_message = self._get_warning_message(username, channel, user_data.warnings)
+
+            self.logger.info(f"Avertissement {user_data.warnings} pour {username} sur {channel}")
+
             return {
                 'action': 'warn',
                 'message': warning_message,
                 'numbers': numbers,
-                'user_violations': user_data['warnings']
+                'user_violations': user_data.warnings
             }
     
+    def _sweep_expired(self, current_time: float):
+        """Supprime les utilisateurs dont les violations ont expiré et qui ne sont plus bannis."""
+        self._last_sweep = current_time
+        reset_seconds = self.violation_reset_hours * 3600
+
+        expired = [
+            username for username, data in self.user_violations.items()
+            if current_time - data.last_violation > reset_seconds
+            and current_time > data.banned_until
+        ]
+        for username in expired:
+            del self.user_violations[username]
+
+        if expired:
+            self.logger.info(f"Purge violations numéros: {len(expired)} utilisateurs expirés retirés")
+
     def _get_warning_message(self, username: str, channel: str, warning_count: int) -> str:
         """Retourne un message d'avertissement rotatif."""
-        # Utiliser le warning_count pour la rotation
-        message_index = (warning_count - 1) % len(self.warning_messages)
-        message_template = self.warning_messages[message_index]
-        
-        return message_template.format(user=username, channel=channel)
+        # Utiliser le warning_count pour la rotation (masque: len == 4)
+        message_index = (warning_count - 1) & self._warn_mask
+
+        return self._warning_templates[message_index] % {'user': username, 'channel': channel}
     
     def _get_ban_message(self, username: str, channel: str) -> str:
         """Retourne un message de ban rotatif."""
         # Rotation basée sur l'heure pour varier
-        message_index = int(time.time() / 3600) % len(self.ban_messages)
-        message_template = self.ban_messages[message_index]
-        
-        return message_template.format(user=username, channel=channel)
+        message_index = int(time.time() / 3600) % len(self._ban_templates)
+
+        return self._ban_templates[message_index] % {'user': username, 'channel': channel}
     
     def get_user_stats(self, username: str) -> Optional[dict]:
         """Retourne les statistiques d'un utilisateur."""
-        username_lower = username.lower()
+        username_lower = self._key(username)
         if username_lower not in self.user_violations:
             return None
         
@@ -166,17 +223,17 @@ class PhoneModerator:
         
         return {
             'username': username,
-            'warnings': user_data['warnings'],
-            'numbers_shared': len(user_data['numbers']),
-            'last_violation': user_data['last_violation'],
-            'banned_until': user_data['banned_until'],
-            'is_banned': current_time < user_data['banned_until'],
-            'time_until_unban': max(0, int((user_data['banned_until'] - current_time) / 3600))
+            'warnings': user_data.warnings,
+            'numbers_shared': len(user_data.numbers),
+            'last_violation': user_data.last_violation,
+            'banned_until': user_data.banned_until,
+            'is_banned': current_time < user_data.banned_until,
+            'time_until_unban': max(0, int((user_data.banned_until - current_time) / 3600))
         }
     
     def reset_user_violations(self, username: str) -> bool:
         """Remet à zéro les violations d'un utilisateur (commande admin)."""
-        username_lower = username.lower()
+        username_lower = self._key(username)
         if username_lower in self.user_violations:
             del self.user_violations[username_lower]
             self.logger.info(f"Violations reset pour {username}")
@@ -187,10 +244,15 @@ class PhoneModerator:
         """Retourne un résumé des statistiques de modération."""
         current_time = time.time()
         
+        # Une seule passe sur les valeurs au lieu de trois générateurs
         total_users = len(self.user_violations)
-        warned_users = sum(1 for u in self.user_violations.values() if u['warnings'] > 0)
-        banned_users = sum(1 for u in self.user_violations.values() if current_time < u['banned_until'])
-        total_numbers = sum(len(u['numbers']) for u in self.user_violations.values())
+        warned_users = banned_users = total_numbers = 0
+        for u in self.user_violations.values():
+            if u.warnings > 0:
+                warned_users += 1
+            if current_time < u.banned_until:
+                banned_users += 1
+            total_numbers += len(u.numbers)
         
         return {
             'total_users_tracked': total_users,
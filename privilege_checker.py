@@ -5,6 +5,7 @@ Gère la détection des ops, halfops, voice et exemptions de modération.
 """
 
 import logging
+import time
 from typing import Optional
 
 
@@ -22,7 +23,12 @@ class PrivilegeChecker:
         self.exempt_ops = config.get('moderation', {}).get('exempt_ops', True)
         self.exempt_halfops = config.get('moderation', {}).get('exempt_halfops', True) 
         self.exempt_voice = config.get('moderation', {}).get('exempt_voice', True)
-        
+
+        # Cache court (channel, nick) -> (timestamp, résultat): un même
+        # message déclenche souvent 2-3 vérifications de privilèges de suite
+        self._priv_cache = {}
+        self._priv_cache_ttl = 2.0
+
         self.logger.info(f"Exemptions modération: ops={self.exempt_ops}, halfops={self.exempt_halfops}, voice={self.exempt_voice}")
     
     def check_user_privileges(self, irc_client, channel: str, nickname: str) -> dict:
@@ -30,60 +36,53 @@ class PrivilegeChecker:
         Vérifie tous les privilèges d'un utilisateur.
         Retourne un dict avec les statuts détectés.
         """
+        now = time.monotonic()
+        cache_key = (channel, nickname)
+        cached = self._priv_cache.get(cache_key)
+        if cached is not None and now - cached[0] < self._priv_cache_ttl:
+            return cached[1]
+
         try:
             if not hasattr(irc_client, 'channels') or channel not in irc_client.channels:
                 return {'op': False, 'halfop': False, 'voice': False, 'error': 'Channel not found'}
             
             channel_obj = irc_client.channels[channel]
-            
-            # Méthode 1: Utiliser les méthodes IRC library
-            is_op = False
-            is_halfop = False
-            is_voice = False
-            
-            try:
-                is_op = channel_obj.is_oper(nickname)
-            except:
-                pass
-            
-            try:
-                is_halfop = channel_obj.is_halfop(nickname) if hasattr(channel_obj, 'is_halfop') else False
-            except:
-                pass
-            
-            try:
-                is_voice = channel_obj.is_voiced(nickname) if hasattr(channel_obj, 'is_voiced') else False
-            except:
-                pass
-            
+
+            # Méthode 1: Utiliser les méthodes IRC library.
+            # getattr avec défaut None plutôt que try/except par sonde:
+            # pas de frame d'exception sur le chemin courant, un seul
+            # filet de sécurité global en bas de fonction
+            fn = getattr(channel_obj, 'is_oper', None)
+            is_op = bool(fn and fn(nickname))
+
+            fn = getattr(channel_obj, 'is_halfop', None)
+            is_halfop = bool(fn and fn(nickname))
+
+            fn = getattr(channel_obj, 'is_voiced', None)
+            is_voice = bool(fn and fn(nickname))
+
             # Méthode 2: Vérifier les modes utilisateur si disponible
             if not (is_op or is_halfop or is_voice):
-                try:
-                    if hasattr(channel_obj, 'get_user_modes'):
-                        modes = channel_obj.get_user_modes(nickname)
-                        if modes:
-                            is_op = 'o' in modes
-                            is_halfop = 'h' in modes  
-                            is_voice = 'v' in modes
-                except:
-                    pass
-            
+                fn = getattr(channel_obj, 'get_user_modes', None)
+                modes = fn(nickname) if fn else None
+                if modes:
+                    is_op = 'o' in modes
+                    is_halfop = 'h' in modes
+                    is_voice = 'v' in modes
+
             # Méthode 3: Parser les préfixes dans la liste des utilisateurs
             if not (is_op or is_halfop or is_voice):
-                try:
-                    users = channel_obj.users()
-                    for user in users:
-                        # Certaines libs IRC stockent les préfixes avec le nom
-                        if user.lstrip('@%+') == nickname:
-                            if user.startswith('@'):
-                                is_op = True
-                            elif user.startswith('%'):
-                                is_halfop = True
-                            elif user.startswith('+'):
-                                is_voice = True
-                            break
-                except:
-                    pass
+                fn = getattr(channel_obj, 'users', None)
+                for user in fn() if fn else ():
+                    # Certaines libs IRC stockent les préfixes avec le nom
+                    if user.lstrip('@%+') == nickname:
+                        if user.startswith('@'):
+                            is_op = True
+                        elif user.startswith('%'):
+                            is_halfop = True
+                        elif user.startswith('+'):
+                            is_voice = True
+                        break
             
             result = {
                 'op': is_op,
@@ -92,9 +91,15 @@ class PrivilegeChecker:
                 'error': None
             }
             
-            self.logger.debug(f"Privilèges {nickname} sur {channel}: {result}")
+            # Formatage %-différé: rien n'est construit si DEBUG est coupé
+            self.logger.debug("Privilèges %s sur %s: %s", nickname, channel, result)
+
+            # Mémoriser, avec éviction grossière si le cache enfle
+            if len(self._priv_cache) > 1024:
+                self._priv_cache.clear()
+            self._priv_cache[cache_key] = (now, result)
             return result
-            
+
         except Exception as e:
             error_result = {'op': False, 'halfop': False, 'voice': False, 'error': str(e)}
             self.logger.error(f"Erreur vérification privilèges {nickname}: {e}")
@@ -117,15 +122,15 @@ class PrivilegeChecker:
         
         # Vérifier les exemptions selon la configuration
         if privileges['op'] and self.exempt_ops:
-            self.logger.debug(f"{nickname} exempté (op)")
+            self.logger.debug("%s exempté (op)", nickname)
             return True
-        
+
         if privileges['halfop'] and self.exempt_halfops:
-            self.logger.debug(f"{nickname} exempté (halfop)")
+            self.logger.debug("%s exempté (halfop)", nickname)
             return True
-            
+
         if privileges['voice'] and self.exempt_voice:
-            self.logger.debug(f"{nickname} exempté (voice)")
+            self.logger.debug("%s exempté (voice)", nickname)
             return True
         
         return False
@@ -156,6 +161,11 @@ class PrivilegeChecker:
         """
         Log détaillé d'une vérification de privilèges pour debug.
         """
+        # Ne pas payer les deux vérifications ni la construction du dict
+        # si le niveau INFO est masqué
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+
         privileges = self.check_user_privileges(irc_client, channel, nickname)
         is_exempt = self.is_exempt_from_moderation(irc_client, channel, nickname)
         
@@ -172,7 +182,7 @@ class PrivilegeChecker:
             }
         }
         
-        self.logger.info(f"🔍 PRIVILEGE_CHECK: {privilege_detail}")
+        self.logger.info("🔍 PRIVILEGE_CHECK: %s", privilege_detail)
 
 
 if __name__ == "__main__":
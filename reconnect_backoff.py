@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Backoff exponentiel avec jitter pour les reconnexions IRC.
+Évite qu'une déconnexion massive ne provoque une reconnexion
+simultanée de tous les clients (thundering herd).
+"""
+
+import random
+
+
+class ReconnectBackoff:
+    """
+    Calcule les délais de reconnexion en backoff exponentiel "full jitter":
+    delay = uniform(0, min(cap, base * factor**attempts)).
+
+    reset() remet le compteur à zéro, à appeler une fois la connexion
+    restée stable pendant `reset_after` secondes.
+    """
+
+    def __init__(self, base=1.0, factor=2.0, cap=300.0, reset_after=600.0):
+        self.base = base
+        self.factor = factor
+        self.cap = cap
+        self.reset_after = reset_after
+        self.attempts = 0
+        # SystemRandom: jitter indépendant entre instances/processus
+        self._random = random.SystemRandom()
+
+    def next_delay(self) -> float:
+        """Retourne le prochain délai (secondes) et incrémente le compteur."""
+        bound = min(self.cap, self.base * (self.factor ** self.attempts))
+        self.attempts += 1
+        return self._random.uniform(0, bound)
+
+    def reset(self):
+        """Remet le compteur de tentatives à zéro."""
+        self.attempts = 0
+
+
+if __name__ == "__main__":
+    # Test basique
+    backoff = ReconnectBackoff(base=2, factor=2, cap=60)
+    delays = [backoff.next_delay() for _ in range(8)]
+    assert all(0 <= d <= 60 for d in delays)
+    backoff.reset()
+    assert backoff.attempts == 0
+    print(f"Délais générés: {[round(d, 1) for d in delays]}")
+    print("ReconnectBackoff test OK")
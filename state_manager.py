@@ -1,11 +1,34 @@
+import bisect
 import json
 import logging
-import time
+import os
 import threading
+import traceback
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 from pathlib import Path
 
+from advanced_moderation_handler import UserViolationHistory
+
+# orjson sérialise en C, émet directement de l'UTF-8 compact et convertit
+# les datetime en ISO-8601 nativement (plus aucune boucle isoformat() en
+# Python). Repli sur le json stdlib si le paquet n'est pas installé.
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=str)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(
+            obj, ensure_ascii=False, separators=(',', ':'),
+            default=lambda o: o.isoformat() if hasattr(o, 'isoformat') else str(o)
+        ).encode('utf-8')
+
+    _loads = json.loads
+
 
 class StateManager:
     """
@@ -24,10 +47,18 @@ class StateManager:
         
         # État à sauvegarder
         self.state_data = {}
+
+        # Résumé du dernier fichier écrit/lu (mtime comme clé de validité):
+        # évite de reparser tout le JSON à chaque get_state_info
+        self._state_info = None
         
         # Thread de sauvegarde
         self.save_thread = None
         self.is_running = False
+        self._stop_event = threading.Event()
+        # Sérialise les sauvegardes concurrentes (thread auto + arrêt/appels
+        # manuels): deux écritures simultanées du même fichier = JSON déchiré
+        self._save_lock = threading.Lock()
         
         # Références aux composants
         self.moderation_handler = None
@@ -42,105 +73,203 @@ class StateManager:
             return
         
         self.is_running = True
+        self._stop_event.clear()
         self.save_thread = threading.Thread(target=self._auto_save_loop, daemon=True)
         self.save_thread.start()
         self.logger.info(f"Sauvegarde automatique démarrée (toutes les {self.save_interval//60} minutes)")
-    
+
     def stop_auto_save(self):
         """Arrête la sauvegarde automatique."""
         self.is_running = False
+        # Réveiller immédiatement le thread au lieu de le laisser finir
+        # son sleep (sinon la sauvegarde finale pouvait croiser une
+        # sauvegarde retardataire du thread abandonné)
+        self._stop_event.set()
         if self.save_thread:
             self.save_thread.join(timeout=5)
-        
+
         # Sauvegarder une dernière fois
         self.save_state()
         self.logger.info("Sauvegarde automatique arrêtée")
-    
+
     def _auto_save_loop(self):
         """Boucle de sauvegarde automatique."""
-        while self.is_running:
+        # wait() retourne False quand le délai expire (→ sauvegarder) et True
+        # dès que stop_auto_save signale l'arrêt (sortie immédiate)
+        while not self._stop_event.wait(self.save_interval):
             try:
-                time.sleep(self.save_interval)
-                if self.is_running:  # Vérifier qu'on n'est pas en cours d'arrêt
-                    self.save_state()
+                # Si une sauvegarde est déjà en cours ailleurs, sauter ce
+                # cycle plutôt que d'empiler une deuxième écriture identique
+                if not self._save_lock.acquire(blocking=False):
+                    continue
+                try:
+                    self._write_state()
+                finally:
+                    self._save_lock.release()
             except Exception as e:
                 self.logger.error(f"Erreur dans la boucle de sauvegarde automatique: {e}")
     
+    def _prune_expired(self, cutoff_time):
+        """Élague en place les violations expirées chez le moderation_handler.
+
+        Sans élagage, les historiques grossissent indéfiniment et chaque
+        sauvegarde re-filtre des données mortes. L'élagage lui-même est
+        délégué à UserViolationHistory.prune; les utilisateurs vidés sont
+        retirés du dict.
+        """
+        user_violations = self.moderation_handler.user_violations
+        expired_users = []
+
+        for user, history in user_violations.items():
+            if hasattr(history, 'prune'):
+                if history.prune(cutoff_time):
+                    expired_users.append(user)
+            else:
+                # Format ancien (liste simple)
+                del history[:bisect.bisect_right(history, cutoff_time)]
+                if not history:
+                    expired_users.append(user)
+
+        for user in expired_users:
+            del user_violations[user]
+
+        if expired_users:
+            self.logger.debug(f"Élagage d'état: {len(expired_users)} utilisateurs expirés retirés")
+
+    @staticmethod
+    def _serialize_user(history, cutoff_time, base_ts: int) -> Optional[dict]:
+        """Construit l'entrée sérialisable d'un utilisateur (ou None si vide)."""
+        if hasattr(history, 'to_compact'):
+            # Format nouveau: l'historique possède son propre chemin de
+            # sérialisation (bissection + encodage en deltas)
+            return history.to_compact(cutoff_time, base_ts)
+
+        # Format ancien (liste simple triée)
+        idx = bisect.bisect_right(history, cutoff_time)
+        recent_violations = [int(v.timestamp()) - base_ts for v in history[idx:]]
+        if recent_violations:
+            return {'violations': recent_violations}
+
+        return None
+
     def save_state(self):
         """Sauvegarde l'état actuel du bot."""
+        with self._save_lock:
+            self._write_state()
+
+    def _write_state(self):
+        """Écrit l'état sur disque (appelé sous _save_lock)."""
         try:
-            # Préparer les données à sauvegarder
-            state_data = {
-                'timestamp': datetime.now().isoformat(),
-                'version': '3.0',
-                'user_violations': {},
-                'stats': {
-                    'total_saves': self.state_data.get('stats', {}).get('total_saves', 0) + 1,
-                    'last_save': datetime.now().isoformat()
-                }
+            # Un seul datetime.now() par sauvegarde: timestamp, last_save et
+            # cutoff dérivent tous du même instant (et restent cohérents entre eux)
+            now = datetime.now()
+            timestamp = now.isoformat()
+            stats = {
+                'total_saves': self.state_data.get('stats', {}).get('total_saves', 0) + 1,
+                'last_save': timestamp
             }
-            
-            # Sauvegarder les violations utilisateurs si disponibles
+            cutoff_time = now - timedelta(hours=self.max_age_hours)
+            # Référence temporelle du fichier: les violations sont encodées
+            # en secondes entières relatives à cet instant
+            base_ts = int(now.timestamp())
+
+            # Élaguer d'abord les données expirées: la sérialisation qui suit
+            # ne parcourt alors que des entrées vivantes
             if self.moderation_handler and hasattr(self.moderation_handler, 'user_violations'):
-                # Filtrer les violations récentes seulement
-                cutoff_time = datetime.now() - timedelta(hours=self.max_age_hours)
-                
-                for user, history in self.moderation_handler.user_violations.items():
-                    if hasattr(history, 'warnings'):
-                        # Format nouveau (AdvancedModerationHandler)
-                        recent_warnings = [
-                            w.isoformat() if hasattr(w, 'isoformat') else str(w)
-                            for w in history.warnings if w > cutoff_time
-                        ]
-                        recent_kicks = [
-                            k.isoformat() if hasattr(k, 'isoformat') else str(k)
-                            for k in history.kicks if k > cutoff_time
-                        ]
-                        
-                        if recent_warnings or recent_kicks:
-                            state_data['user_violations'][user] = {
-                                'warnings': recent_warnings,
-                                'kicks': recent_kicks,
-                                'violations_by_type': {
-                                    vtype: [v.isoformat() if hasattr(v, 'isoformat') else str(v) 
-                                           for v in violations if v > cutoff_time]
-                                    for vtype, violations in history.violations_by_type.items()
-                                }
-                            }
-                    else:
-                        # Format ancien (liste simple)
-                        recent_violations = [
-                            v.isoformat() if hasattr(v, 'isoformat') else str(v)
-                            for v in history if v > cutoff_time
-                        ]
-                        if recent_violations:
-                            state_data['user_violations'][user] = {'violations': recent_violations}
-            
-            # Créer une sauvegarde de l'ancien fichier
+                self._prune_expired(cutoff_time)
+
             state_path = Path(self.state_file)
             backup_path = Path(self.backup_file)
-            
+            tmp_path = self.state_file + '.tmp'
+
+            # Écrire le nouvel état en flux: chaque utilisateur est sérialisé
+            # et écrit individuellement (format compact, sans indentation),
+            # sans jamais matérialiser le gros dict user_violations en mémoire
+            users_count = 0
+            with open(tmp_path, 'wb', buffering=1 << 20) as f:
+                f.write(b'{"timestamp": %s, "version": "3.1", "base_ts": %d, "user_violations": {'
+                        % (_dumps(timestamp), base_ts))
+
+                if self.moderation_handler and hasattr(self.moderation_handler, 'user_violations'):
+                    for user, history in self.moderation_handler.user_violations.items():
+                        entry = self._serialize_user(history, cutoff_time, base_ts)
+                        if entry is None:
+                            continue
+                        if users_count:
+                            f.write(b',')
+                        f.write(_dumps(user))
+                        f.write(b':')
+                        f.write(_dumps(entry))
+                        users_count += 1
+
+                f.write(b'}, "stats": %s}' % _dumps(stats))
+
+            # Rotation par renommages purs (opérations d'inode, aucune copie
+            # de contenu): l'ancien état devient le backup, puis le fichier
+            # temporaire prend sa place via os.replace atomique — un crash en
+            # pleine écriture ne laisse jamais de JSON déchiré à l'emplacement final
             if state_path.exists():
-                # Copier l'ancien fichier en backup
-                import shutil
-                shutil.copy2(state_path, backup_path)
-            
-            # Écrire le nouvel état
-            with open(self.state_file, 'w', encoding='utf-8') as f:
-                json.dump(state_data, f, indent=2, ensure_ascii=False)
-            
-            self.state_data = state_data
-            
-            users_count = len(state_data['user_violations'])
-            total_saves = state_data['stats']['total_saves']
-            
+                os.replace(state_path, backup_path)
+            os.replace(tmp_path, self.state_file)
+
+            # Ne conserver en mémoire que l'en-tête (les violations restent
+            # la propriété du moderation_handler)
+            self.state_data = {'timestamp': timestamp, 'version': '3.1', 'stats': stats}
+
+            total_saves = stats['total_saves']
+
+            # Mémoriser le résumé pour get_state_info
+            file_stat = state_path.stat()
+            self._state_info = {
+                'timestamp': timestamp,
+                'version': '3.1',
+                'users_count': users_count,
+                'total_saves': total_saves,
+                'file_size_kb': file_stat.st_size / 1024,
+                'mtime': file_stat.st_mtime
+            }
+
             self.logger.debug(f"État sauvegardé: {users_count} utilisateurs, sauvegarde #{total_saves}")
-            
+
         except Exception as e:
             self.logger.error(f"Erreur lors de la sauvegarde d'état: {e}")
-            import traceback
             self.logger.error(f"Stack trace: {traceback.format_exc()}")
     
+    @staticmethod
+    def _parse_deltas(deltas, base_ts: int) -> list:
+        """Décode des deltas de secondes (format 3.1) en datetime."""
+        fromts = datetime.fromtimestamp
+        try:
+            return [fromts(base_ts + d) for d in deltas]
+        except (ValueError, TypeError, OverflowError, OSError):
+            parsed = []
+            for d in deltas:
+                try:
+                    parsed.append(fromts(base_ts + d))
+                except (ValueError, TypeError, OverflowError, OSError):
+                    continue
+            return parsed
+
+    @staticmethod
+    def _parse_times(strings) -> list:
+        """Parse une liste de timestamps ISO-8601 en datetime.
+
+        Chemin rapide: une seule compréhension avec la méthode liée
+        (fromisoformat est en C depuis 3.11). Si une entrée est corrompue,
+        repli élément par élément pour n'écarter que celle-là.
+        """
+        fromiso = datetime.fromisoformat
+        try:
+            return [fromiso(s) for s in strings]
+        except (ValueError, TypeError):
+            parsed = []
+            for s in strings:
+                try:
+                    parsed.append(fromiso(s))
+                except (ValueError, TypeError):
+                    continue
+            return parsed
+
     def restore_state(self) -> bool:
         """Restaure l'état depuis le fichier de sauvegarde."""
         try:
@@ -159,12 +288,12 @@ class StateManager:
                 self.logger.info("Aucun fichier d'état trouvé, démarrage à neuf")
                 return False
             
-            with open(load_path, 'r', encoding='utf-8') as f:
-                state_data = json.load(f)
+            with open(load_path, 'rb') as f:
+                state_data = _loads(f.read())
             
-            # Vérifier la version
+            # Vérifier la version (3.0: timestamps ISO, 3.1: deltas + base_ts)
             version = state_data.get('version', '1.0')
-            if version != '3.0':
+            if version not in ('3.0', '3.1'):
                 self.logger.warning(f"Version d'état incompatible: {version}, démarrage à neuf")
                 return False
             
@@ -172,7 +301,6 @@ class StateManager:
             timestamp_str = state_data.get('timestamp')
             if timestamp_str:
                 try:
-                    from datetime import datetime
                     timestamp = datetime.fromisoformat(timestamp_str)
                     age_hours = (datetime.now() - timestamp).total_seconds() / 3600
                     
@@ -186,52 +314,29 @@ class StateManager:
             # Restaurer les données si moderation_handler disponible
             if self.moderation_handler and hasattr(self.moderation_handler, 'user_violations'):
                 restored_users = 0
-                
+
+                # Décodeur selon le format: deltas relatifs à base_ts (3.1)
+                # ou chaînes ISO-8601 (3.0)
+                base_ts = state_data.get('base_ts')
+                if base_ts is not None:
+                    def parse(values):
+                        return self._parse_deltas(values, base_ts)
+                else:
+                    parse = self._parse_times
+
                 for user, data in state_data.get('user_violations', {}).items():
                     if 'warnings' in data:  # Format nouveau
-                        from advanced_moderation_handler import UserViolationHistory
-                        from datetime import datetime
-                        
-                        history = UserViolationHistory(warnings=[], kicks=[], violations_by_type={})
-                        
-                        # Restaurer warnings
-                        for w_str in data.get('warnings', []):
-                            try:
-                                history.warnings.append(datetime.fromisoformat(w_str))
-                            except ValueError:
-                                continue
-                        
-                        # Restaurer kicks
-                        for k_str in data.get('kicks', []):
-                            try:
-                                history.kicks.append(datetime.fromisoformat(k_str))
-                            except ValueError:
-                                continue
-                        
-                        # Restaurer violations par type
-                        for vtype, violations in data.get('violations_by_type', {}).items():
-                            history.violations_by_type[vtype] = []
-                            for v_str in violations:
-                                try:
-                                    history.violations_by_type[vtype].append(datetime.fromisoformat(v_str))
-                                except ValueError:
-                                    continue
-                        
+                        history = UserViolationHistory.from_compact(data, parse)
+
                         if history.warnings or history.kicks:
                             self.moderation_handler.user_violations[user] = history
                             restored_users += 1
-                    
+
                     else:  # Format ancien (compatibilité)
-                        violations = []
-                        for v_str in data.get('violations', []):
-                            try:
-                                violations.append(datetime.fromisoformat(v_str))
-                            except ValueError:
-                                continue
-                        
+                        violations = parse(data.get('violations', []))
+
                         if violations:
                             # Adapter au nouveau format
-                            from advanced_moderation_handler import UserViolationHistory
                             history = UserViolationHistory(warnings=violations, kicks=[], violations_by_type={})
                             self.moderation_handler.user_violations[user] = history
                             restored_users += 1
@@ -247,24 +352,47 @@ class StateManager:
                 
         except Exception as e:
             self.logger.error(f"Erreur lors de la restauration d'état: {e}")
-            import traceback
             self.logger.error(f"Stack trace: {traceback.format_exc()}")
             return False
     
     def get_state_info(self) -> Dict[str, Any]:
         """Retourne des informations sur l'état sauvegardé."""
         try:
-            if Path(self.state_file).exists():
-                with open(self.state_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                return {
-                    'file_exists': True,
+            state_path = Path(self.state_file)
+            if state_path.exists():
+                # Réutiliser le résumé en mémoire tant que le fichier n'a pas
+                # changé sur disque: O(1) au lieu de reparser tout le JSON
+                info = self._state_info
+                if info is not None and info['mtime'] == state_path.stat().st_mtime:
+                    return {
+                        'file_exists': True,
+                        'timestamp': info['timestamp'],
+                        'version': info['version'],
+                        'users_count': info['users_count'],
+                        'total_saves': info['total_saves'],
+                        'file_size_kb': info['file_size_kb']
+                    }
+
+                with open(state_path, 'rb') as f:
+                    data = _loads(f.read())
+
+                file_stat = state_path.stat()
+                self._state_info = {
                     'timestamp': data.get('timestamp'),
                     'version': data.get('version'),
                     'users_count': len(data.get('user_violations', {})),
                     'total_saves': data.get('stats', {}).get('total_saves', 0),
-                    'file_size_kb': Path(self.state_file).stat().st_size / 1024
+                    'file_size_kb': file_stat.st_size / 1024,
+                    'mtime': file_stat.st_mtime
+                }
+
+                return {
+                    'file_exists': True,
+                    'timestamp': self._state_info['timestamp'],
+                    'version': self._state_info['version'],
+                    'users_count': self._state_info['users_count'],
+                    'total_saves': self._state_info['total_saves'],
+                    'file_size_kb': self._state_info['file_size_kb']
                 }
             else:
                 return {